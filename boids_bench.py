@@ -0,0 +1,234 @@
+"""
+Boid simulation benchmarks.
+
+Steps both boid implementations headlessly at several flock sizes with fixed
+seeds and reports steps per second, the cost of each steering rule and peak
+memory:
+
+    rules     boids_test.py: Boid.apply_behaviours + Boid.update for every boid
+    game      version-2/boids.py: GameApp.update_boids over the whole flock,
+              split into four armies heading for the four corners; its rule
+              costs are FlockingEngine.step and the neighbour_pairs search
+              inside it
+
+    python boids_bench.py --out boid_runs/bench.json
+    python boids_bench.py --sizes 10 100 --baseline boid_runs/bench.json --threshold 0.15
+
+The flock is spread over a square world sized so that density, and so the
+number of neighbours per boid, stays the same at every size. With
+--baseline, any case whose steps/sec dropped or whose peak memory grew by
+more than the threshold is flagged, and the exit status is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "version-2"))
+from flocking import Flock, FlockingEngine
+
+SIZES = (10, 100, 1000, 10000)
+BOID_SPACING = 40  # World side grows with sqrt(boids) so every size has the same density
+RULES = ("align", "cohere", "separate", "avoid_obstacles", "attract_to_goal")
+
+
+def world_size(boids):
+    return max(200.0, BOID_SPACING * np.sqrt(boids))
+
+
+class RulesBench:
+    """boids_test.BoidWorld with the flock spread over the world, one obstacle and one goal."""
+
+    name = "rules"
+
+    def __init__(self, boids):
+        import boids_test
+
+        size = world_size(boids)
+        self.module = boids_test
+        self.world = boids_test.BoidWorld(size, size, boids)
+        self.world.flock.positions[:boids] = np.random.rand(boids, 2) * size
+        # Off-centre: boids that reach the goal are released again from the exact centre
+        self.world.obstacles = [np.array([size * 0.3, size * 0.6])]
+        self.world.goals = [np.array([size * 0.9, size * 0.9])]
+        self.output = io.StringIO()
+
+    def step(self):
+        # attract_to_goal prints when few boids remain; keep that out of the report
+        with contextlib.redirect_stdout(self.output):
+            self.world.step()
+        self.output.seek(0)
+        self.output.truncate()
+
+    def timed_methods(self):
+        return self.module.Boid, RULES + ("update",)
+
+
+class GameBench:
+    """GameApp.update_boids stepping every boid; no Tk window is created."""
+
+    name = "game"
+
+    def __init__(self, boids):
+        from boids import GameApp
+
+        size = world_size(boids)
+        self.update_boids = GameApp.update_boids
+        # update_boids only needs the app's flock and flocking engine
+        self.app = SimpleNamespace(flock=Flock(boids), flocking=FlockingEngine())
+        corners = np.array([[0, 0], [size, 0], [0, size], [size, size]], dtype='float64')
+        for k, position in enumerate(np.random.rand(boids, 2) * size):
+            self.app.flock.add(position, army=k % len(corners))
+        self.targets = corners
+
+    def step(self):
+        flock = self.app.flock
+        indices = flock.active_indices()
+        armies = flock.armies[indices]
+        self.update_boids(self.app, indices, self.targets[armies], armies)
+
+    def timed_methods(self):
+        return FlockingEngine, ("neighbour_pairs", "step")
+
+
+BENCHES = {"rules": RulesBench, "game": GameBench}
+
+
+def seed_everything(seed):
+    np.random.seed(seed)
+    random.seed(seed)
+
+
+def time_steps(bench, min_steps, seconds):
+    """Steps per second, running at least min_steps steps and for at least seconds."""
+    bench.step()  # Warm-up
+    steps = 0
+    start = time.perf_counter()
+    while steps < min_steps or time.perf_counter() - start < seconds:
+        bench.step()
+        steps += 1
+    return steps / (time.perf_counter() - start)
+
+
+def rule_costs(bench, steps):
+    """Mean milliseconds per step spent in each of the bench's timed methods."""
+    owner, names = bench.timed_methods()
+    totals = defaultdict(float)
+    originals = {name: getattr(owner, name) for name in names}
+
+    def timed(name, method):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                totals[name] += time.perf_counter() - start
+        return wrapper
+
+    try:
+        for name, method in originals.items():
+            setattr(owner, name, timed(name, method))
+        for _ in range(steps):
+            bench.step()
+    finally:
+        for name, method in originals.items():
+            setattr(owner, name, method)
+    return {name: 1000 * totals[name] / steps for name in names}
+
+
+def peak_memory(bench_class, boids, seed, steps):
+    """Peak traced allocation in KiB while building the flock and stepping it."""
+    seed_everything(seed)
+    tracemalloc.start()
+    try:
+        bench = bench_class(boids)
+        for _ in range(steps):
+            bench.step()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1024
+
+
+def run_case(bench_class, boids, seed, seconds, min_steps, profile_steps):
+    seed_everything(seed)
+    steps_per_second = time_steps(bench_class(boids), min_steps, seconds)
+    seed_everything(seed)
+    costs = rule_costs(bench_class(boids), profile_steps)
+    return {
+        "engine": bench_class.name,
+        "boids": boids,
+        "steps_per_second": steps_per_second,
+        "rule_ms_per_step": costs,
+        "peak_memory_kib": peak_memory(bench_class, boids, seed, profile_steps),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Human-readable regressions of results against baseline, matched by (engine, boids)."""
+    previous = {(case["engine"], case["boids"]): case for case in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        old = previous.get((case["engine"], case["boids"]))
+        if old is None:
+            continue
+        label = f"{case['engine']} n={case['boids']}"
+        if case["steps_per_second"] < old["steps_per_second"] * (1 - threshold):
+            regressions.append(f"{label}: {old['steps_per_second']:.1f} -> {case['steps_per_second']:.1f} steps/sec")
+        if case["peak_memory_kib"] > old["peak_memory_kib"] * (1 + threshold):
+            regressions.append(f"{label}: {old['peak_memory_kib']:.0f} -> {case['peak_memory_kib']:.0f} KiB peak")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the boid simulations at several flock sizes.")
+    parser.add_argument("--engines", nargs="+", choices=sorted(BENCHES), default=sorted(BENCHES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(SIZES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--seconds", type=float, default=2.0, help="Minimum timing run per case")
+    parser.add_argument("--min-steps", type=int, default=3, help="Minimum timed steps per case")
+    parser.add_argument("--profile-steps", type=int, default=3, help="Steps for rule costs and peak memory")
+    parser.add_argument("--out", default="boid_runs/bench.json", help="JSON file for the results")
+    parser.add_argument("--baseline", help="Earlier results file to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed relative slowdown or memory growth")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    cases = []
+    for engine in args.engines:
+        for boids in args.sizes:
+            case = run_case(BENCHES[engine], boids, args.seed, args.seconds, args.min_steps, args.profile_steps)
+            cases.append(case)
+            costs = ", ".join(f"{name} {ms:.2f}" for name, ms in case["rule_ms_per_step"].items())
+            print(f"{engine:>5} n={boids:<6} {case['steps_per_second']:9.1f} steps/sec  "
+                  f"{case['peak_memory_kib']:9.0f} KiB peak  ms/step: {costs}")
+
+    results = {"seed": args.seed, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": cases}
+    if os.path.dirname(args.out):
+        os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w") as out_file:
+        json.dump(results, out_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        for regression in regressions:
+            print("REGRESSION", regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
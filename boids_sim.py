@@ -0,0 +1,183 @@
+"""
+Headless boid scenario runner.
+
+Steps a boid scenario as fast as possible with no display and writes the
+final state and per-step metrics to disk, for parameter sweeps on machines
+without a screen and for measuring raw steps per second.
+
+    python boids_sim.py scenario.json --out runs/example
+    python boids_sim.py --boids 500 --steps 2000 --goal 600 100 --obstacle 500 200 --seed 1 --out runs/quick
+
+A scenario file is a JSON object with any of the keys engine, boids, width,
+height, obstacles, goals, seed and steps; command-line flags override it.
+Two engines are available:
+
+    rules     the per-boid rules from boids_test.py (BoidWorld)
+    flocking  the batched FlockingEngine from version-2, steering every boid
+              to its nearest goal; it has no obstacle avoidance
+
+The output directory gets final_state.npz, metrics.csv and summary.json.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "version-2"))
+from flocking import Flock, FlockingEngine
+
+DEFAULT_SCENARIO = {
+    "engine": "rules",
+    "boids": 30,
+    "width": 800,
+    "height": 600,
+    "obstacles": [],
+    "goals": [],
+    "seed": 0,
+    "steps": 1000,
+}
+
+
+class RulesRun:
+    """Scenario stepped with boids_test.BoidWorld."""
+
+    def __init__(self, scenario):
+        from boids_test import BoidWorld
+
+        self.world = BoidWorld(scenario["width"], scenario["height"], scenario["boids"])
+        self.world.obstacles = [np.array(obstacle, dtype='float64') for obstacle in scenario["obstacles"]]
+        self.world.goals = [np.array(goal, dtype='float64') for goal in scenario["goals"]]
+        self.flock = self.world.flock
+        self.output = io.StringIO()
+
+    def step(self):
+        # attract_to_goal prints when few boids remain; keep that off stdout and out of the timings
+        with contextlib.redirect_stdout(self.output):
+            self.world.step()
+        self.output.seek(0)
+        self.output.truncate()
+
+    def active(self):
+        return np.array([not boid.goal_state for boid in self.world.boids])
+
+
+class FlockingRun:
+    """Scenario stepped with the batched FlockingEngine; boids that reach a goal leave the flock."""
+
+    def __init__(self, scenario):
+        self.engine = FlockingEngine()
+        self.flock = Flock(scenario["boids"])
+        centre = np.array([scenario["width"] / 2, scenario["height"] / 2])
+        for _ in range(scenario["boids"]):
+            self.flock.add(centre + np.random.rand(2) * 10 - 5)
+        self.goals = np.array(scenario["goals"], dtype='float64').reshape(-1, 2)
+
+    def step(self):
+        indices = self.flock.active_indices()
+        if len(indices) == 0 or len(self.goals) == 0:
+            return
+
+        positions = self.flock.positions[indices]
+        velocities = self.flock.velocities[indices]
+        distances = np.linalg.norm(positions[:, None, :] - self.goals[None, :, :], axis=2)
+        ends = self.goals[distances.argmin(axis=1)]
+        self.engine.step(positions, velocities, ends)
+        self.flock.positions[indices] = positions
+        self.flock.velocities[indices] = velocities
+
+        arrived = np.linalg.norm(positions - ends, axis=1) < 10
+        self.flock.release(indices[arrived])
+
+    def active(self):
+        return self.flock.active[:self.flock.size].copy()
+
+
+ENGINES = {"rules": RulesRun, "flocking": FlockingRun}
+
+
+def run(scenario, out_dir):
+    """Run one scenario and write its results into out_dir. Returns the summary dict."""
+    np.random.seed(scenario["seed"])
+    random.seed(scenario["seed"])
+    simulation = ENGINES[scenario["engine"]](scenario)
+    flock = simulation.flock
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "metrics.csv"), "w", newline="") as metrics_file:
+        metrics = csv.writer(metrics_file)
+        metrics.writerow(["step", "step_ms", "active_boids", "mean_speed", "spread"])
+
+        run_start = time.perf_counter()
+        for step in range(scenario["steps"]):
+            step_start = time.perf_counter()
+            simulation.step()
+            step_ms = 1000 * (time.perf_counter() - step_start)
+
+            active = simulation.active()
+            positions = flock.positions[:flock.size][active]
+            speeds = np.linalg.norm(flock.velocities[:flock.size][active], axis=1)
+            spread = float(np.linalg.norm(positions.std(axis=0))) if len(positions) else 0.0
+            metrics.writerow([step, f"{step_ms:.4f}", int(active.sum()),
+                              f"{speeds.mean() if len(speeds) else 0.0:.4f}", f"{spread:.4f}"])
+        elapsed = time.perf_counter() - run_start
+
+    np.savez(os.path.join(out_dir, "final_state.npz"),
+             positions=flock.positions[:flock.size],
+             velocities=flock.velocities[:flock.size],
+             active=simulation.active())
+
+    summary = {
+        "scenario": scenario,
+        "seconds": elapsed,
+        "steps_per_second": scenario["steps"] / elapsed if elapsed > 0 else float("inf"),
+        "final_active_boids": int(simulation.active().sum()),
+    }
+    with open(os.path.join(out_dir, "summary.json"), "w") as summary_file:
+        json.dump(summary, summary_file, indent=2)
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run a boid scenario headlessly.")
+    parser.add_argument("scenario", nargs="?", help="JSON scenario file")
+    parser.add_argument("--out", default="boid_runs/latest", help="Directory for the results")
+    parser.add_argument("--engine", choices=sorted(ENGINES))
+    parser.add_argument("--boids", type=int)
+    parser.add_argument("--width", type=int)
+    parser.add_argument("--height", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--steps", type=int)
+    parser.add_argument("--obstacle", nargs=2, type=float, action="append", metavar=("X", "Y"))
+    parser.add_argument("--goal", nargs=2, type=float, action="append", metavar=("X", "Y"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    scenario = dict(DEFAULT_SCENARIO)
+    if args.scenario:
+        with open(args.scenario) as scenario_file:
+            scenario.update(json.load(scenario_file))
+    for key in ("engine", "boids", "width", "height", "seed", "steps"):
+        if getattr(args, key) is not None:
+            scenario[key] = getattr(args, key)
+    if args.obstacle:
+        scenario["obstacles"] = args.obstacle
+    if args.goal:
+        scenario["goals"] = args.goal
+
+    summary = run(scenario, args.out)
+    print(f"{scenario['steps']} steps in {summary['seconds']:.2f}s "
+          f"({summary['steps_per_second']:.1f} steps/s), results in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
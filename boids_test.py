@@ -1,7 +1,13 @@
+import os
+import sys
 import tkinter as tk
 import numpy as np
 import random
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "version-2"))
+from flocking import Flock, flock_attribute
+from spatial_hash import SpatialHash
+
 # Parameters
 num_boids = 30
 boid_perception = 30
@@ -11,16 +17,28 @@ obstacle_radius = 10
 critical_distance = 20
 boid_radius = 8  # This represents half the "diameter" of a boid.
 min_separation = boid_radius * 2  # Minimum distance between boid centers to avoid overlap.
+# Boids move sequentially within a tick, so neighbour candidates are gathered with some slack
+neighbour_radius = boid_perception + 2 * max_speed
 
 class Boid:
-    def __init__(self, canvas, x, y):
+    # Vector state lives in the shared Flock arrays; the boid itself is a small handle
+    __slots__ = ("flock", "index", "canvas", "goal_state", "item", "visible")
+
+    position = flock_attribute("positions")
+    velocity = flock_attribute("velocities")
+    acceleration = flock_attribute("accelerations")
+    momentum = flock_attribute("momenta")
+
+    def __init__(self, flock, canvas, x, y):
+        self.flock = flock
+        self.index = flock.add([x, y])
         self.canvas = canvas
-        self.position = np.array([x, y], dtype='float64')
         self.velocity = np.random.rand(2) * 2 - 1
         self.velocity = self.velocity / np.linalg.norm(self.velocity) * max_speed
-        self.acceleration = np.zeros(2)
-        self.momentum = np.zeros(2)
         self.goal_state = False
+        # One long-lived oval per boid, moved each frame instead of recreated (none when headless)
+        self.item = None if canvas is None else canvas.create_oval(x-2, y-2, x+2, y+2, fill="white", outline="#D3D3D3", width=2)
+        self.visible = True
         
     def update(self):
         self.update_momentum()  # Update momentum based on current acceleration
@@ -34,8 +52,17 @@ class Boid:
         self.acceleration *= 0
         
     def display(self):
+        # Boids waiting at a goal are hidden rather than deleted
+        if self.goal_state:
+            if self.visible:
+                self.canvas.itemconfigure(self.item, state="hidden")
+                self.visible = False
+            return
         x, y = self.position
-        self.canvas.create_oval(x-2, y-2, x+2, y+2, fill="white", outline="#D3D3D3", width=2)
+        self.canvas.coords(self.item, x-2, y-2, x+2, y+2)
+        if not self.visible:
+            self.canvas.itemconfigure(self.item, state="normal")
+            self.visible = True
 
     def apply_behaviours(self, boids, obstacles, goals, active_boids_count):
         alignment = self.align(boids)
@@ -178,72 +205,64 @@ class Boid:
         return direction_to_goal * max_force * force_multiplier
 
 
-class Simulation:
-    def __init__(self, master):
-        self.master = master
-        self.width = 800
-        self.height = 600
-        self.canvas = tk.Canvas(master, width=self.width, height=self.height, bg='black')
-        self.canvas.pack()
+class BoidWorld:
+    """
+    Boids, obstacles and goals stepped without any display, so the same rules
+    run in the Tk window (Simulation) and in headless batch runs.
+    """
+    tick_ms = 50  # Simulated time per step
+
+    def __init__(self, width=800, height=600, boid_count=num_boids, canvas=None):
+        self.width = width
+        self.height = height
         initial_position = np.array([self.width / 2, self.height / 2])
-        self.boids = [Boid(self.canvas, initial_position[0] + np.random.rand() * 10 - 5, initial_position[1] + np.random.rand() * 10 - 5) for _ in range(num_boids)]
-        # self.boids = [Boid(self.canvas, np.random.rand() * self.width, np.random.rand() * self.height) for _ in range(num_boids)]
+        self.flock = Flock(boid_count)
+        self.boids = [Boid(self.flock, canvas, initial_position[0] + np.random.rand() * 10 - 5, initial_position[1] + np.random.rand() * 10 - 5) for _ in range(boid_count)]
+        # self.boids = [Boid(self.flock, canvas, np.random.rand() * self.width, np.random.rand() * self.height) for _ in range(boid_count)]
         self.obstacles = []
-        self.active_boids_count = len(self.boids)  
-        self.master.bind('<Button-1>', self.create_obstacle)
+        self.goals = []
+        self.active_boids_count = len(self.boids)
+        self.grid = SpatialHash(neighbour_radius)
 
-        self.goals = []  # Initialize an empty list for goals
-        self.master.bind('<Button-2>', self.add_goal)
-                         # Bind mouse right-click to add a goal
-    
-        self.update()
+        self.tick = 0
+        self.pending_releases = []  # (tick, boid) pairs waiting to be sent out again
 
-    def create_obstacle(self, event):
-        self.obstacles.append(np.array([event.x, event.y]))
-    
     def count_active_boids(self):
         # Count boids that have not reached the goal
         self.active_boids_count = sum(not boid.goal_state for boid in self.boids)
 
-    def add_goal(self, event):
-        self.goals.append(np.array([event.x, event.y]))  # Add the goal position
-
-    def update(self):
-        self.canvas.delete("all")
-        for obstacle in self.obstacles:
-            self.canvas.create_oval(obstacle[0]-obstacle_radius, obstacle[1]-obstacle_radius,
-                                    obstacle[0]+obstacle_radius, obstacle[1]+obstacle_radius,
-                                    fill='red')
-            
-        # Draw goals
-        for goal in self.goals:
-            self.canvas.create_oval(goal[0]-5, goal[1]-5, goal[0]+5, goal[1]+5, fill='green')
-
+    def step(self):
         self.count_active_boids()
 
         all_boids_reached_goal = all(boid.goal_state for boid in self.boids)
-        
-        if all_boids_reached_goal:
+
+        if all_boids_reached_goal and not self.pending_releases:
             self.release_boids()  # Start the incremental release.
 
-        # Update boids with goal attraction
+        # Send out the boids whose release time has come
+        due = [boid for tick, boid in self.pending_releases if tick <= self.tick]
+        self.pending_releases = [(tick, boid) for tick, boid in self.pending_releases if tick > self.tick]
+        for boid in due:
+            self.reset_and_activate_boid(boid)
+
+        # Index boid positions once per tick so each boid only looks at its surrounding cells.
+        # The grid keeps the array it is given, so hand it a copy: boids move while the tick runs
+        snapshot = self.flock.positions[:self.flock.size].copy()
+        self.grid.rebuild(snapshot)
+
+        # Update boids with goal attraction; neighbours are whoever was in range at the start of the tick
         for boid in self.boids:
-            boid.apply_behaviours(self.boids, self.obstacles, self.goals, self.active_boids_count)
-            
+            neighbours = [self.boids[i] for i in self.grid.query(snapshot[boid.index], neighbour_radius)]
+            boid.apply_behaviours(neighbours, self.obstacles, self.goals, self.active_boids_count)
             boid.update()
-            if not boid.goal_state:
-                boid.display()
-            # boid.display()
 
-        self.master.after(50, self.update)
+        self.tick += 1
 
     def release_boids(self):
-        # Check if all boids have reached the goal and are ready to be released
-        if all(boid.goal_state for boid in self.boids):
-            # Calculate a random delay for each boid's release, up to a maximum of 1000 ms (1 second)
-            for boid in self.boids:
-                delay = random.randint(50, 1000)  # Random delay between 0 and 1000 milliseconds
-                self.master.after(delay, lambda b=boid: self.reset_and_activate_boid(b))
+        # Calculate a random delay for each boid's release, up to a maximum of 1000 ms (1 second)
+        for boid in self.boids:
+            delay = random.randint(50, 1000)  # Random delay between 50 and 1000 milliseconds
+            self.pending_releases.append((self.tick + int(np.ceil(delay / self.tick_ms)), boid))
 
     def reset_and_activate_boid(self, boid):
         # Reset boid position to the center with a random offset
@@ -255,7 +274,44 @@ class Simulation:
         boid.velocity = np.random.rand(2) * 2 - 1
         boid.velocity = boid.velocity / np.linalg.norm(boid.velocity) * max_speed
 
-root = tk.Tk()
-root.title("Boid Simulation with Tkinter")
-simulation = Simulation(root)
-root.mainloop()
+
+class Simulation:
+    def __init__(self, master):
+        self.master = master
+        self.width = 800
+        self.height = 600
+        self.canvas = tk.Canvas(master, width=self.width, height=self.height, bg='black')
+        self.canvas.pack()
+        self.world = BoidWorld(self.width, self.height, num_boids, canvas=self.canvas)
+        self.master.bind('<Button-1>', self.create_obstacle)
+        self.master.bind('<Button-2>', self.add_goal)
+                         # Bind mouse right-click to add a goal
+    
+        self.update()
+
+    def create_obstacle(self, event):
+        self.world.obstacles.append(np.array([event.x, event.y]))
+        item = self.canvas.create_oval(event.x-obstacle_radius, event.y-obstacle_radius,
+                                       event.x+obstacle_radius, event.y+obstacle_radius,
+                                       fill='red')
+        self.canvas.tag_lower(item)  # Keep obstacles underneath the boids
+
+    def add_goal(self, event):
+        self.world.goals.append(np.array([event.x, event.y]))  # Add the goal position
+        item = self.canvas.create_oval(event.x-5, event.y-5, event.x+5, event.y+5, fill='green')
+        self.canvas.tag_lower(item)  # Keep goals underneath the boids
+
+    def update(self):
+        # Obstacles, goals and boids keep their canvas items between frames; only boids move
+        self.world.step()
+        for boid in self.world.boids:
+            boid.display()
+
+        self.master.after(BoidWorld.tick_ms, self.update)
+
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("Boid Simulation with Tkinter")
+    simulation = Simulation(root)
+    root.mainloop()
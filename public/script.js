@@ -130,19 +130,25 @@ document.addEventListener('DOMContentLoaded', () => { // Ensures the DOM is full
             });
         });
     }
-    function generatePositions(count, margin) {
+    function generatePositions(count, margin, maxAttempts = 30) {
         let positions = [];
         for (let i = 0; i < count; i++) {
-            let position = {};
-            do {
-                position = {
+            // Try a bounded number of spots; if none is far enough from the others, keep the one that came closest
+            let best = null;
+            let bestDistance = -1;
+            for (let attempt = 0; attempt < maxAttempts && bestDistance < margin; attempt++) {
+                const position = {
                     x: Math.random() * (gameContainer.offsetWidth - margin * 4) + margin,
                     y: Math.random() * (gameContainer.offsetHeight - margin * 4) + margin
                 };
-            } while (positions.some(pos => 
-                Math.sqrt((pos.x - position.x) ** 2 + (pos.y - position.y) ** 2) < margin
-            ));
-            positions.push(position);
+                const nearest = positions.reduce((closest, pos) =>
+                    Math.min(closest, Math.sqrt((pos.x - position.x) ** 2 + (pos.y - position.y) ** 2)), Infinity);
+                if (nearest > bestDistance) {
+                    best = position;
+                    bestDistance = nearest;
+                }
+            }
+            positions.push(best);
         }
         return positions;
     }
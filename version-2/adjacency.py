@@ -0,0 +1,107 @@
+from collections import deque
+
+import numpy as np
+
+
+class RegionAdjacency:
+    """
+    Region adjacency graph in CSR form, built from the Voronoi ridges.
+
+    The neighbours of region r are indices[indptr[r]:indptr[r + 1]], sorted.
+    Region indices are the keys of GameMap.regions, so indptr is sized to the
+    largest index rather than the number of regions.
+    """
+
+    def __init__(self, indptr, indices):
+        self.indptr = indptr
+        self.indices = indices
+        self.indptr.setflags(write=False)
+        self.indices.setflags(write=False)
+
+    @classmethod
+    def from_edges(cls, sources, targets, size):
+        # Make the graph undirected, then drop self loops and duplicates
+        sources, targets = np.concatenate([sources, targets]), np.concatenate([targets, sources])
+        keep = sources != targets
+        keys = np.unique(sources[keep].astype(np.int64) * size + targets[keep])
+        sources, targets = keys // size, keys % size
+
+        indptr = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+        return cls(indptr, targets)
+
+    @classmethod
+    def from_voronoi(cls, vor, regions):
+        """Adjacency between the given Voronoi region indices, from the finite ridges they share."""
+        ridge_vertices = np.asarray(vor.ridge_vertices)
+        ridge_regions = vor.point_region[vor.ridge_points]
+        region_ids = np.fromiter(regions, dtype=np.int64)
+        size = int(max(region_ids.max(), ridge_regions.max())) + 1 if len(region_ids) else 0
+
+        known = np.zeros(size, dtype=bool)
+        known[region_ids] = True
+        keep = (ridge_vertices != -1).all(axis=1) & known[ridge_regions[:, 0]] & known[ridge_regions[:, 1]]
+        return cls.from_edges(ridge_regions[keep, 0], ridge_regions[keep, 1], size)
+
+    @property
+    def size(self):
+        return len(self.indptr) - 1
+
+    def edges(self):
+        """(sources, targets) arrays of every directed edge."""
+        return np.repeat(np.arange(self.size), np.diff(self.indptr)), self.indices
+
+    def relabel(self, mapping):
+        """
+        Copy of the graph with regions renamed through mapping (old -> new index).
+        Regions mapped to the same index are joined into one node.
+        """
+        sources, targets = self.edges()
+        size = max([self.size] + [new + 1 for new in mapping.values()])
+        lookup = np.arange(size)
+        for old, new in mapping.items():
+            lookup[old] = new
+
+        return RegionAdjacency.from_edges(lookup[sources], lookup[targets], size)
+
+    def neighbours(self, region_index):
+        if region_index >= self.size:
+            return self.indices[:0]
+        return self.indices[self.indptr[region_index]:self.indptr[region_index + 1]]
+
+    def are_adjacent(self, a, b):
+        neighbours = self.neighbours(a)
+        slot = np.searchsorted(neighbours, b)
+        return slot < len(neighbours) and neighbours[slot] == b
+
+    def within(self, region_index, hops):
+        """Every region reachable from region_index in at most hops steps, with its distance."""
+        distances = {region_index: 0}
+        frontier = [region_index]
+        for hop in range(1, hops + 1):
+            reached = []
+            for current in frontier:
+                for neighbour in self.neighbours(current).tolist():
+                    if neighbour not in distances:
+                        distances[neighbour] = hop
+                        reached.append(neighbour)
+            frontier = reached
+        return distances
+
+    def path(self, start, end):
+        """Shortest path in region hops from start to end as a list of region indices, or None."""
+        previous = {start: None}
+        queue = deque([start])
+        while queue:
+            current = queue.popleft()
+            if current == end:
+                route = []
+                while current is not None:
+                    route.append(current)
+                    current = previous[current]
+                return route[::-1]
+            for neighbour in self.neighbours(current).tolist():
+                if neighbour not in previous:
+                    previous[neighbour] = current
+                    queue.append(neighbour)
+        return None
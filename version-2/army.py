@@ -0,0 +1,23 @@
+import numpy as np
+
+
+class Army:
+    """
+    A march from one city to another.
+
+    The army's boids are rows of the shared Flock labelled with the army's
+    id, so every army is stepped in the same batched pass; the army only
+    holds what is specific to the march.
+    """
+
+    def __init__(self, army_id, owner, origin, target, destination, strength):
+        self.id = army_id
+        self.owner = owner
+        self.origin = origin  # Region index of the city the army left
+        self.target = target  # Region index of the city it is marching on
+        self.destination = np.asarray(destination, dtype='float64')  # Canvas coordinates of the target city
+        self.strength = strength  # Boids sent
+        self.remaining = strength  # Boids still marching
+
+    def __repr__(self):
+        return f"Army({self.id}, owner={self.owner!r}, {self.origin} -> {self.target}, {self.remaining}/{self.strength})"
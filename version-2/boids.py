@@ -7,6 +7,15 @@ import random
 from shapely.geometry import Polygon, MultiPoint, Point, box
 from shapely.ops import unary_union
 import time
+from map_generator import MapGenerator
+from region_locator import RegionLocator
+from highlight_layer import HighlightLayer
+from terrain_raster import render_terrain
+from map_renderer import MapRenderer
+from viewport import ViewportCuller
+from flocking import Flock, FlockingEngine, flock_attribute
+from scheduler import FixedStepScheduler
+from army import Army
 # from voronoi import mirror_points
 
 class GameApp:
@@ -30,13 +39,31 @@ class GameApp:
 
         self.canvas = None  # To hold the tkinter canvas for Voronoi diagram
         self.points = None
-        self.vor = None
+        self.map = None
+        self.locator = None
+        self.highlight = None
         self.centroids = None
-
-        self.boids = []
+        self.seed = None  # Fixed map seed, or None for a fresh map every game
+        self.map_cache = None  # MapCache reusing maps across restarts and replays, or None to regenerate every time
+        self.raster_terrain = False  # Draw the terrain as one pre-rendered image instead of vector polygons
+        self.terrain_image = None
+        self.renderer = None
+        self.tcl_script_drawing = False  # Draw each map layer with one Tcl script instead of one Tk call per item
+        self.map_scale = 1  # Map size as a multiple of the window; larger maps scroll and get map_scale ** 2 times the regions
+        self.viewport_culling = False  # Only keep canvas items for regions near the visible part of the map
+        self.viewport = None
+        self.generation_report = None  # GenerationReport of the current map
+        self.report_path = None  # JSON file to write each map's generation report to, if set
+
+        self.boids = []  # Boid handles, in flock row order
         self.boid_speed = 5
         self.perception_radius = 50
         self.max_acceleration = 0.5
+        self.flocking = FlockingEngine(self.boid_speed, self.perception_radius, self.max_acceleration)
+        self.flock = Flock()
+        self.armies = {}  # Armies in flight by id
+        self.next_army_id = 0
+        self.scheduler = FixedStepScheduler(self.root, self.step_simulation, self.render_boids, dt=0.1)
 
         self.regions = 120
         self.cities = 80
@@ -49,10 +76,16 @@ class GameApp:
         play_button = tk.Button(self.menu_frame, text="Play", command=self.start_game)
         play_button.pack(pady=20)
 
-    def start_game(self):
+    def start_game(self, seed=None):
         if self.game_frame:
             self.game_frame.destroy()
 
+        # Boids from the previous game belong to the old canvas
+        self.scheduler.stop()
+        self.boids = []
+        self.flock = Flock()
+        self.armies = {}
+
         self.menu_frame.pack_forget()
         self.game_frame = tk.Frame(self.root)
         self.game_frame.pack(fill=tk.BOTH, expand=True)
@@ -68,7 +101,7 @@ class GameApp:
         self.canvas = tk.Canvas(self.game_frame, width=self.game_width, height=self.game_height, bg='white')
         self.canvas.pack()
 
-        self.generate_voronoi()
+        self.generate_voronoi(seed)
         # self.build_terrain()
         self.canvas.bind("<Motion>", self.on_mouse_over)
         self.canvas.bind("<Button-1>", self.on_mouse_click)
@@ -81,6 +114,7 @@ class GameApp:
         
         self.canvas.bind_all("<MouseWheel>", self.on_vertical_scroll)  # For Windows and MacOS
         self.canvas.bind_all("<Shift-MouseWheel>", self.on_horizontal_scroll)  # A common approach
+        self.canvas.bind("<Configure>", self.update_viewport)
 
         self.start_timer()
 
@@ -101,6 +135,7 @@ class GameApp:
         
         # Apply the vertical scroll
         self.canvas.yview_scroll(scroll_steps, "units")
+        self.update_viewport()
 
     def on_horizontal_scroll(self, event):
         # Check for platform
@@ -119,9 +154,14 @@ class GameApp:
 
         # Apply the horizontal scroll
         self.canvas.xview_scroll(scroll_steps, "units")
+        self.update_viewport()
 
     def restart_game(self):
-        self.start_game()
+        # With a map cache, restarting replays the current map straight from the cache
+        if self.map_cache is not None and self.map is not None:
+            self.start_game(seed=self.map.seed)
+        else:
+            self.start_game()
 
     def start_timer(self):
         self.start_time = time.time()
@@ -135,209 +175,99 @@ class GameApp:
         self.timer_label.config(text=f"Timer: {elapsed_time}")
         self.root.after(1000, self.update_timer)  # Update the timer every 1 second
 
-    def mirror_points(self, points, bounding_box):
-        """
-        Mirror points at the edges of the bounding box to ensure bounded Voronoi regions.
-        """
-        points_left = np.copy(points)
-        points_left[:, 0] = bounding_box[0] - (points_left[:, 0] - bounding_box[0])
-
-        points_right = np.copy(points)
-        points_right[:, 0] = bounding_box[1] + (bounding_box[1] - points_right[:, 0])
-
-        points_down = np.copy(points)
-        points_down[:, 1] = bounding_box[2] - (points_down[:, 1] - bounding_box[2])
-
-        points_up = np.copy(points)
-        points_up[:, 1] = bounding_box[3] + (bounding_box[3] - points_up[:, 1])
-
-        # Combine original and mirrored points
-        all_points = np.vstack([points, points_left, points_right, points_down, points_up])
-        
-        return all_points
-
-    def generate_voronoi(self):
-
-        distance_from_edge = 20
-        new_edge = 20
-        buffer_distance = 40
-
-        # Generate points inside the canvas, away from the edge
-        inner_points = np.random.rand(self.regions - 4, 2)
-        inner_points[:, 0] *= (self.game_width - 2 * distance_from_edge)
-        inner_points[:, 1] *= (self.game_height - 2 * distance_from_edge)
-        inner_points += distance_from_edge
-
-        # Generate additional buffer points closer to the edge
-        buffer_points = np.random.rand(self.regions // 2, 2)  # One third as many buffer points
-        buffer_points[:, 0] *= (self.game_width - 2 * buffer_distance)
-        buffer_points[:, 1] *= (self.game_height - 2 * buffer_distance)
-        buffer_points += buffer_distance
-
-        self.points = np.vstack([inner_points, buffer_points])
-        self.bounding_box = np.array([0., self.game_width, 0., self.game_height])
-
-        print("Points:", self.points)
-        print("Bounding box:", self.bounding_box)
-
-        self.points = self.mirror_points(self.points, self.bounding_box)
-        self.vor = Voronoi(self.points)
-
-        self.regions_data = {}
-
-        for region_index, region_vertices in enumerate(self.vor.regions):
-
-            if not region_vertices or -1 in region_vertices:  # Skip empty or infinite regions
-                continue
-
-            polygon = [self.vor.vertices[i] for i in region_vertices]
-            sandy_base = self.get_sandy_color()
-            centroid = np.mean(polygon, axis=0)
-
-            # Filter out distant regions
-            if any(x < (-100) or x >= (self.game_width + 200) for x, _ in polygon) or \
-                any(y < (-100) or y >= (self.game_height + 200) for _, y in polygon):
-                    continue
-            
-            # Set all initial data for each region to dict
-            self.regions_data[region_index] = {
-                "vertices": region_vertices,
-                "polygon": polygon,
-                "sandy_base": sandy_base,
-                "centroid": centroid,
-                "is_city": False,  # Will update this flag for cities
-                "city_coords": None,  # Will update for cities
-                "edge": False  # Will update for edge regions
-            }
-
-            # Check if the region is close to the edge
-            if any(x < new_edge or x >= (self.game_width - new_edge) for x, _ in polygon) or \
-                any(y < new_edge or y >= (self.game_height - new_edge) for _, y in polygon):
-                    self.regions_data[region_index].update({"edge": True})
-
-                    # Combine some edge regions into larger ones with neighbors
-                    self.playable_regions(polygon, centroid, sandy_base, 0.8, 5, tag="region")
-                    continue
-            
-            # Decorate according to region type
-            self.playable_regions(polygon, centroid, sandy_base, 0.8, 5, tag="region")
-            # Set edge to False
-            self.regions_data[region_index].update({"edge": False})
-
-        # Crown cities
-        valid_city_indices = [
-                i for i in range(len(self.points))
-                if self.vor.point_region[i] in self.regions_data and not self.regions_data[self.vor.point_region[i]].get("edge", False)]
-        self.centroids = np.random.choice(valid_city_indices, size=self.cities, replace=False)
-        for i in self.centroids:
-            # Ensure we have the right region index for each city
-            region_index = self.vor.point_region[i]
-            if region_index in self.regions_data:
-                x, y = self.points[i]
-                self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black')
-
-                # Update the data structure
-                self.regions_data[region_index].update({
-                    "is_city": True,
-                    "city_coords": (x, y)
-                })
-
-                # Add the index text
-                self.canvas.create_text(x + 10, y, text=str(region_index), font=("Arial", 8), tags="index")
-
-    def playable_regions(self, polygon, centroid, sandy_base, opacity, width, tag=""):
-
-        if centroid is None:
-            centroid = np.mean(polygon, axis=0)
-
-        sandy_light = self.get_sandy_lighter_color(sandy_base, opacity)
-        sandy_outline = self.get_sandy_lighter_color(sandy_base, opacity - 0.3)
-        self.canvas.create_polygon(*np.ravel(polygon), outline=sandy_outline, fill=sandy_light, width=width, tags=f"{tag}")
-
-        sandy_light_2 = self.get_sandy_lighter_color(sandy_light, 1.1)
-        adjusted_polygon = [(p + centroid) / 2 for p in polygon]
-        self.canvas.create_polygon(*np.ravel(adjusted_polygon), outline='', fill=sandy_light_2, tags=f"{tag}")
-
-        sandy_light_3 = self.get_sandy_lighter_color(sandy_light_2, 1.1)
-        adjusted_polygon = [(p + centroid) / 2 for p in adjusted_polygon]
-        self.canvas.create_polygon(*np.ravel(adjusted_polygon), outline='', fill=sandy_light_3, tags=f"{tag}")
-
-    def get_sandy_color(self):
-        # Base sandy RGB values
-        base_r, base_g, base_b = 222, 184, 135  # RGB for #deb887
-        
-        # Standard deviation for variation
-        std_dev = 5
-        
-        # Apply Gaussian variation
-        r = int(random.gauss(base_r, std_dev))
-        g = int(random.gauss(base_g, std_dev))
-        b = int(random.gauss(base_b, std_dev))
-        
-        # Clamp values to valid RGB range
-        r = max(min(r, 255), 0)
-        g = max(min(g, 255), 0)
-        b = max(min(b, 255), 0)
-        
-        return f'#{r:02x}{g:02x}{b:02x}'
-
-    def get_sandy_lighter_color(self, colour, opacity):
-
-        r, g, b = int(colour[1:3], 16), int(colour[3:5], 16), int(colour[5:7], 16)
+    def generate_voronoi(self, seed=None):
+        seed = self.seed if seed is None else seed
+        # self.regions is per window's worth of map, so regions keep their size on a scaled-up map
+        regions = self.regions * self.map_scale ** 2
+        generator = MapGenerator(self.game_width * self.map_scale, self.game_height * self.map_scale, regions, self.cities, seed=seed, merge_edges=False)
+        self.map = self.map_cache.generate(generator) if self.map_cache is not None else generator.generate()
+        self.points = self.map.points
+        self.centroids = self.map.city_points
+        self.regions_data = self.map.regions_data()
+        self.locator = RegionLocator(self.map)
+        self.highlight = HighlightLayer(self.canvas)
+        self.renderer = MapRenderer(self.canvas, tcl_script=self.tcl_script_drawing)
+        self.viewport = None
+        if self.map_scale != 1:
+            self.canvas.configure(scrollregion=(0, 0, self.map.width, self.map.height))
+
+        with generator.report.stage("drawing"):
+            self.draw_terrain()
+
+            # Crown cities, with their index labels on a layer of their own above them
+            if self.viewport is None:  # The culler draws cities along with their regions
+                self.renderer.draw_cities(self.regions_data, city_tag="city", label_tag="index")
+
+        self.generation_report = generator.report
+        if self.report_path:
+            self.generation_report.to_json(self.report_path)
+
+    def terrain_layers(self):
+        # Region index -> (rings, palette, width), decorated according to region type
+        return {region_index: (region_data["rings"], region_data["palette"][0.8], 5)
+                for region_index, region_data in self.regions_data.items()}
+
+    def draw_terrain(self):
+        layers = self.terrain_layers()
+        if self.raster_terrain:
+            # The terrain never changes during a game, so draw it once into a single image item
+            image, (x, y) = render_terrain(list(layers.values()))
+            self.terrain_image = ImageTk.PhotoImage(image)  # Keep a reference or Tk drops the image
+            self.canvas.create_image(x, y, anchor=tk.NW, image=self.terrain_image, tags="region")
+        elif self.viewport_culling:
+            # Only regions near the visible part of the map get canvas items; scrolling adds and removes them
+            cities = {region_index: region_data["city_coords"]
+                      for region_index, region_data in self.regions_data.items() if region_data["is_city"]}
+            self.viewport = ViewportCuller(self.canvas, self.renderer, layers, cities, tag="region")
+            self.viewport.update()
+        else:
+            self.renderer.draw_regions(layers.values(), tag="region")
 
-        # Base sandy RGB values
-        r = int((1 - opacity) * 255 + opacity * r)
-        g = int((1 - opacity) * 255 + opacity * g)
-        b = int((1 - opacity) * 255 + opacity * b)
+    def update_viewport(self, event=None):
+        if self.viewport is not None:
+            self.viewport.update()
 
-        # Clamp values to valid RGB range
-        r = max(min(r, 255), 0)
-        g = max(min(g, 255), 0)
-        b = max(min(b, 255), 0)
+    def playable_regions(self, rings, palette, width, tag=""):
+        outline, inner_ring, innermost_ring = rings
+        sandy_light, sandy_outline, sandy_light_2, sandy_light_3 = palette
 
-        # Convert RGB back to hexadecimal
-        lighter_color = f'#{r:02x}{g:02x}{b:02x}'
-        return lighter_color
+        return [
+            self.canvas.create_polygon(*outline, outline=sandy_outline, fill=sandy_light, width=width, tags=f"{tag}"),
+            self.canvas.create_polygon(*inner_ring, outline='', fill=sandy_light_2, tags=f"{tag}"),
+            self.canvas.create_polygon(*innermost_ring, outline='', fill=sandy_light_3, tags=f"{tag}")
+        ]
 
     def on_mouse_over(self, event):
-        x, y = event.x, event.y
-        min_distance = float('inf')
-        closest_region_index = None
-
-        # Iterate through regions_data to find the closest centroid
-        for region_index, region_info in self.regions_data.items():
-            if region_info['centroid'] is None:
-                continue
-            centroid = region_info['centroid']
-            distance = np.sqrt((centroid[0] - x) ** 2 + (centroid[1] - y) ** 2)
-            if distance < min_distance:
-                min_distance = distance
-                closest_region_index = region_index
-
-        # If a region is close enough, highlight its region
-        if closest_region_index is not None:  # Adjust threshold as needed
+        closest_region_index = self.identify_region(event.x, event.y)
+
+        # If the cursor is over a region, highlight it
+        if closest_region_index is not None:
             self.highlight_region(closest_region_index)
         else:
-            # If no region is close enough, remove any existing highlight
-            self.canvas.delete("highlight")
+            # If the cursor is off the map, hide any existing highlight
+            self.highlight.hide()
 
     def highlight_region(self, region_index):
-        self.canvas.delete("highlight")  # Remove any existing highlights
-
         if region_index in self.regions_data:
-            region_info = self.regions_data[region_index]
-            polygon = region_info['polygon']  # Use the pre-computed polygon
-            sandy_base = region_info['sandy_base']
-            centroid = region_info['centroid']
+            self.highlight.show(region_index, lambda: self.draw_highlight(region_index))
+        else:
+            self.highlight.hide()
+
+    def draw_highlight(self, region_index):
+        region_info = self.regions_data[region_index]
+        rings = region_info['rings']  # Use the pre-computed outline and inner rings
+        palette = region_info['palette'][0.9]  # Use the pre-computed colours
 
-            # Highlight the region if playable
-            self.playable_regions(polygon, centroid, sandy_base, 0.9, 1, tag="highlight")
+        # Highlight the region if playable
+        items = self.playable_regions(rings, palette, 1, tag="highlight")
 
-            # Use city_coords location and draw oval
-            if region_info['is_city']:
-                x, y = region_info['city_coords']
-                self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black', tags="highlight")
-                self.canvas.create_text(x + 10, y, text=str(region_index), font=("Arial", 8), tags="index")
+        # Use city_coords location and draw oval
+        if region_info['is_city']:
+            x, y = region_info['city_coords']
+            items.append(self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black', tags="highlight"))
+            items.append(self.canvas.create_text(x + 10, y, text=str(region_index), font=("Arial", 8), tags="highlight"))
+
+        return items
 
     def on_mouse_click(self, event):
         # x, y = event.x, event.y
@@ -382,113 +312,88 @@ class GameApp:
         self.start_region_index = None
 
     def identify_region(self, x, y):
-        min_distance = float('inf')
-        closest_region_index = None
-
-        # Iterate through regions_data to find the closest centroid
-        for region_index, region_info in self.regions_data.items():
-            if region_info['centroid'] is None:
-                continue
-            centroid = region_info['centroid']
-            distance = np.sqrt((centroid[0] - x) ** 2 + (centroid[1] - y) ** 2)
-            if distance < min_distance:
-                min_distance = distance
-                closest_region_index = region_index
-
-        # If a region is close enough, return its index
-        return closest_region_index
-
-    def send_boids(self, start, end):
+        # Event coordinates are window-relative; the map lives in canvas coordinates
+        return self.locator.locate(self.canvas.canvasx(x), self.canvas.canvasy(y))
+
+    def send_boids(self, start, end, owner="player"):
+        origin, target = start, end
         start = self.regions_data[start]['city_coords']
         start = np.array(start)
         end = self.regions_data[end]['city_coords']
         end = np.array(end)
         print(f"Sending boids from {start} to {end}")
 
-        # Initialize boids with unique IDs based on current active boids
-        current_boid_count = len([boid for boid in self.boids if boid.active])
-        new_boids = [Boid(start, boid_id=current_boid_count + i) for i in range(10)]
-        self.boids.extend(new_boids)
-
-        for boid in new_boids:
-            boid.graphic_id = self.canvas.create_oval(
-                boid.position[0] - 2, boid.position[1] - 2, 
-                boid.position[0] + 2, boid.position[1] + 2, 
-                fill='black', tags=f"boid_{boid.id}"
-            )
-
-        # Start updating boids for the first time
-        self.update_boids_continuously(end)
-
-    def update_boids_continuously(self, end):
-
-        active_boids = [boid for boid in self.boids if boid.active]
-        if not active_boids:  # No more active boids to update
-            return
-
-        self.update_boids(active_boids, end)
-
-        for boid in active_boids:
-            if np.linalg.norm(boid.position - end) < 10:
-                boid.active = False  # Deactivate boid
-                self.canvas.delete(boid.graphic_id)  # Optionally, remove the boid's visual representation
+        army = Army(self.next_army_id, owner, origin, target, end, strength=10)
+        self.next_army_id += 1
+        self.armies[army.id] = army
+
+        # Take boids from the pool, reusing the handle and oval of recycled rows
+        x, y = start
+        for _ in range(army.strength):
+            index = self.flock.add(start, army=army.id)
+            if index < len(self.boids):
+                graphic_id = self.boids[index].graphic_id
+                self.canvas.coords(graphic_id, x - 2, y - 2, x + 2, y + 2)
+                self.canvas.itemconfigure(graphic_id, state="normal")
             else:
-                self.move_boid(boid)
-
-        # Schedule the next update
-        self.root.after(100, lambda: self.update_boids_continuously(end))
-
-    def update_boids(self, boids, end, cohesion_strength=0.05, alignment_strength=0.05, separation_strength=0.03):
-        for boid in boids:
-            acceleration = np.zeros(2)
-
-            nearby_boids = [other for other in boids if np.linalg.norm(boid.position - other.position) < self.perception_radius and other != boid]
-
-            # Cohesion: Move towards the average position of nearby boids
-            cohesion_vector = np.zeros(2)
-            if nearby_boids:
-                average_position = np.mean([other.position for other in nearby_boids], axis=0)
-                cohesion_vector = (average_position - boid.position) * cohesion_strength
-
-            # Cohesion - Move towards the average position of nearby boids
-            cohesion_center = np.mean([other.position for other in boids if np.linalg.norm(boid.position - other.position) < self.perception_radius and other != boid], axis=0, keepdims=True)
-            if len(cohesion_center) > 0:
-                cohesion_vector = self.normalize(cohesion_center - boid.position) * self.boid_speed - boid.velocity
-                acceleration += self.limit_magnitude(cohesion_vector, self.max_acceleration)
-
-            # Alignment: Align velocity with the average velocity of nearby boids
-            average_velocity = np.mean([other.velocity for other in boids if np.linalg.norm(boid.position - other.position) < self.perception_radius and other != boid], axis=0, keepdims=True)
-            if len(average_velocity) > 0:
-                alignment_vector = self.normalize(average_velocity) * self.boid_speed - boid.velocity
-                acceleration += self.limit_magnitude(alignment_vector, self.max_acceleration)
-
-            # Separation: Move away from nearby boids to avoid crowding
-            separation_vector = np.sum([(boid.position - other.position) / np.linalg.norm(boid.position - other.position)**2 for other in boids if np.linalg.norm(boid.position - other.position) < self.perception_radius and other != boid], axis=0)
-            if np.linalg.norm(separation_vector) > 0:
-                acceleration += self.limit_magnitude(self.normalize(separation_vector) * self.boid_speed, self.max_acceleration)
-
-            # Goal direction
-            goal_direction = self.normalize(end - boid.position) * self.boid_speed
-            acceleration += self.limit_magnitude(goal_direction - boid.velocity, self.max_acceleration)
-
-            # Apply acceleration and limit speed
-            boid.velocity += acceleration
-            boid.velocity = self.limit_magnitude(boid.velocity, self.boid_speed)
-            boid.position += boid.velocity
-
-            # Adjust velocity based on the behaviors
-            move_vector = cohesion_vector + alignment_vector + separation_vector
-
-            # Calculate direction towards the goal and add to move vector
-            to_goal = (end - boid.position) * 0.01
-            move_vector += to_goal
-
-            # Normalize and apply speed
-            if np.linalg.norm(move_vector) > 0:
-                move_vector = move_vector / np.linalg.norm(move_vector) * self.boid_speed
-
-            boid.velocity = move_vector
-            boid.position += boid.velocity
+                boid = Boid(self.flock, index)
+                boid.graphic_id = self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black', tags="boid")
+                self.boids.append(boid)
+
+        # The scheduler advances every army together
+        self.scheduler.start()
+
+    def step_simulation(self, dt):
+        # Advance every army by one fixed step; returns whether anything is still moving
+        flock = self.flock
+        indices = flock.active_indices()
+        if len(indices) == 0:
+            self.armies.clear()
+            return False
+
+        # Broadcast each army's destination onto its boids
+        army_ids = np.fromiter(self.armies, dtype=np.int64, count=len(self.armies))  # Ascending, ids only grow
+        destinations = np.array([army.destination for army in self.armies.values()])
+        boid_armies = flock.armies[indices]
+        ends = destinations[np.searchsorted(army_ids, boid_armies)]
+
+        flock.previous_positions[indices] = flock.positions[indices]
+        self.update_boids(indices, ends, boid_armies)
+
+        # Boids that reached their target go back to the pool and their ovals are hidden for reuse
+        arrived = np.linalg.norm(flock.positions[indices] - ends, axis=1) < 10
+        flock.release(indices[arrived])
+        for index in indices[arrived].tolist():
+            self.canvas.itemconfigure(self.boids[index].graphic_id, state="hidden")
+
+        # Retire armies with no boids left
+        remaining = np.bincount(np.searchsorted(army_ids, boid_armies[~arrived]), minlength=len(army_ids))
+        for army_id, count in zip(army_ids.tolist(), remaining.tolist()):
+            self.armies[army_id].remaining = count
+            if count == 0:
+                del self.armies[army_id]
+
+        return bool(self.armies)
+
+    def render_boids(self, alpha):
+        # Draw each boid between its last two simulated positions
+        flock = self.flock
+        indices = flock.active_indices()
+        previous = flock.previous_positions[indices]
+        drawn = previous + (flock.positions[indices] - previous) * alpha
+        for index, (x, y) in zip(indices.tolist(), drawn.tolist()):
+            self.canvas.coords(self.boids[index].graphic_id, x - 2, y - 2, x + 2, y + 2)
+
+    def update_boids(self, indices, ends, armies):
+        # Step the given rows of the flock arrays in one batched pass; boids flock within their own army
+        flock = self.flock
+        positions = flock.positions[indices]
+        velocities = flock.velocities[indices]
+        displacements = self.flocking.step(positions, velocities, ends, groups=armies)
+
+        flock.positions[indices] = positions
+        flock.velocities[indices] = velocities
+        return displacements
 
     def calculate_cohesion(self, boids):
         """Calculate the average position of the boids to steer towards for cohesion."""
@@ -497,33 +402,21 @@ class GameApp:
         average_position = np.mean([boid.position for boid in boids], axis=0)
         return average_position
 
-    def move_boid(self, boid):
-        dx = boid.velocity[0]
-        dy = boid.velocity[1]
-        self.canvas.move(boid.graphic_id, dx, dy)  # Move the boid's oval
-
-    def normalize(self, vector):
-        norm = np.linalg.norm(vector)
-        if norm == 0: 
-            return vector
-        return vector / norm
-
-    def limit_magnitude(self, vector, max_magnitude):
-        magnitude = np.linalg.norm(vector)
-        if magnitude > max_magnitude:
-            return vector / magnitude * max_magnitude
-        return vector
-
 class Boid:
-    def __init__(self, position, boid_id):
-        self.id = boid_id
-
-        self.position = np.array(position)
-        self.velocity = np.zeros(2)  # Start with zero velocity for simplicity
+    """A handle on one row of a Flock; the boid's state lives in the flock's arrays."""
+    __slots__ = ("flock", "index", "graphic_id")
+
+    position = flock_attribute("positions")
+    previous_position = flock_attribute("previous_positions")  # Position before the last simulation step
+    velocity = flock_attribute("velocities")  # Starts at zero for simplicity
+    active = flock_attribute("active")
+    id = flock_attribute("ids")  # Unique for the life of the flock, even when the row is recycled
+
+    def __init__(self, flock, index):
+        self.flock = flock
+        self.index = index
         self.graphic_id = None  # To store the canvas ID of the boid's oval
 
-        self.active = True
-
 if __name__ == "__main__":
     root = tk.Tk()
     app = GameApp(root)
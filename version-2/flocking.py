@@ -0,0 +1,183 @@
+import numpy as np
+
+from spatial_hash import SpatialHash
+
+
+def normalize_rows(vectors):
+    """Scale each row to unit length, leaving zero rows untouched."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def limit_rows(vectors, max_magnitude):
+    """Clamp the length of each row to max_magnitude."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    scale = np.where(norms > max_magnitude, max_magnitude / np.where(norms == 0, 1, norms), 1.0)
+    return vectors * scale
+
+
+def segment_sum(index, values, n):
+    """Sum the rows of values into n buckets given by index."""
+    return np.stack([np.bincount(index, weights=values[:, k], minlength=n) for k in range(values.shape[1])], axis=1)
+
+
+class FlockingEngine:
+    """
+    Cohesion, alignment, separation and goal steering for a whole flock at once.
+
+    The flock is held as (N, 2) position and velocity arrays; every rule is
+    evaluated over all neighbour pairs in a handful of array operations rather
+    than one Python loop per boid.
+    """
+
+    def __init__(self, boid_speed=5, perception_radius=50, max_acceleration=0.5, goal_pull=0.01):
+        self.boid_speed = boid_speed
+        self.perception_radius = perception_radius
+        self.max_acceleration = max_acceleration
+        self.goal_pull = goal_pull
+        self.grid = SpatialHash(perception_radius)
+
+    def neighbour_pairs(self, positions, groups=None):
+        # Every ordered pair (i, j) of distinct boids within perception range of each other
+        self.grid.rebuild(positions)
+        i, j = self.grid.pairs(self.perception_radius)
+        if groups is not None:
+            # Boids only flock with their own group
+            same_group = groups[i] == groups[j]
+            i, j = i[same_group], j[same_group]
+        return i, j
+
+    def step(self, positions, velocities, end, groups=None):
+        """
+        Advance every boid one tick towards end (a single point or one per boid).
+        With groups (one label per boid) boids only flock with their own group.
+        positions and velocities are updated in place; the returned (N, 2) array
+        holds how far each boid moved, for the caller to apply to its graphics.
+        """
+        n = len(positions)
+        if n == 0:
+            return np.zeros((0, 2))
+
+        start = positions.copy()
+        speed = self.boid_speed
+        max_acc = self.max_acceleration
+
+        i, j = self.neighbour_pairs(positions, groups)
+        counts = np.bincount(i, minlength=n)
+        has_neighbours = (counts > 0)[:, None]
+        denominator = np.maximum(counts, 1)[:, None]
+
+        # Cohesion: steer towards the average position of nearby boids
+        centre = segment_sum(i, positions[j], n) / denominator
+        cohesion = np.where(has_neighbours, normalize_rows(centre - positions) * speed - velocities, 0)
+
+        # Alignment: match the average velocity of nearby boids
+        average_velocity = segment_sum(i, velocities[j], n) / denominator
+        alignment = np.where(has_neighbours, normalize_rows(average_velocity) * speed - velocities, 0)
+
+        # Separation: push away from nearby boids, weighted by inverse square distance
+        offsets = positions[i] - positions[j]
+        distance_sq = np.einsum('ij,ij->i', offsets, offsets)
+        overlapping = distance_sq > 0
+        separation = segment_sum(i[overlapping], offsets[overlapping] / distance_sq[overlapping, None], n)
+
+        # Goal direction
+        goal = normalize_rows(end - positions) * speed - velocities
+
+        acceleration = limit_rows(cohesion, max_acc) + limit_rows(alignment, max_acc) + limit_rows(goal, max_acc)
+        acceleration += limit_rows(normalize_rows(separation) * speed, max_acc)
+
+        # Apply acceleration and limit speed
+        velocities += acceleration
+        velocities[:] = limit_rows(velocities, speed)
+        positions += velocities
+
+        # Blend the raw behaviours with a pull towards the goal and move again at full speed
+        move = cohesion + alignment + separation + (end - positions) * self.goal_pull
+        velocities[:] = normalize_rows(move) * speed
+        positions += velocities
+
+        return positions - start
+
+
+class Flock:
+    """
+    Structure-of-arrays storage for boid state, with pooled rows.
+
+    Each boid is one row in contiguous float64 arrays (positions, the
+    position before the last step, velocities, accelerations, momenta) plus
+    an entry in the active mask, a unique id and the id of the army it
+    marches with (-1 for none). Released rows go on a free
+    list and are handed out again before the arrays grow, so a long game
+    reuses the same rows instead of growing without bound. The arrays grow
+    by doubling and a row index stays valid for the life of the flock.
+    """
+
+    FIELDS = ("positions", "previous_positions", "velocities", "accelerations", "momenta")
+
+    def __init__(self, capacity=64):
+        self.size = 0  # Rows ever handed out; rows past this have never been used
+        for name in self.FIELDS:
+            setattr(self, name, np.zeros((capacity, 2)))
+        self.active = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.armies = np.full(capacity, -1, dtype=np.int64)
+        self.free = []  # Released rows, reused last-in first-out
+        self.next_id = 0
+
+    @property
+    def capacity(self):
+        return len(self.active)
+
+    def grow(self):
+        capacity = 2 * self.capacity
+        for name in self.FIELDS + ("active", "ids", "armies"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            setattr(self, name, grown)
+
+    def add(self, position, velocity=(0, 0), army=-1):
+        """Store a new active boid, in a recycled row if one is free, and return its row index."""
+        if self.free:
+            index = self.free.pop()
+        else:
+            if self.size == self.capacity:
+                self.grow()
+            index = self.size
+            self.size += 1
+
+        self.positions[index] = position
+        self.previous_positions[index] = position
+        self.velocities[index] = velocity
+        self.accelerations[index] = 0
+        self.momenta[index] = 0
+        self.active[index] = True
+        self.ids[index] = self.next_id
+        self.armies[index] = army
+        self.next_id += 1
+        return index
+
+    def release(self, indices):
+        """Deactivate the given rows and return them to the pool."""
+        indices = np.atleast_1d(indices)
+        self.active[indices] = False
+        self.armies[indices] = -1
+        self.free.extend(indices.tolist())
+
+    def active_indices(self):
+        return np.flatnonzero(self.active[:self.size])
+
+    def stats(self):
+        return {"capacity": self.capacity, "live": self.size - len(self.free), "free": len(self.free)}
+
+
+def flock_attribute(field):
+    """Property that reads and writes one boid's row of a Flock array in place."""
+    def get(boid):
+        return getattr(boid.flock, field)[boid.index]
+
+    def set(boid, value):
+        getattr(boid.flock, field)[boid.index] = value
+
+    return property(get, set)
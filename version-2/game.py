@@ -7,6 +7,12 @@ import random
 from shapely.geometry import Polygon, MultiPoint, Point, box
 from shapely.ops import unary_union
 import time
+from map_generator import MapGenerator
+from region_locator import RegionLocator
+from highlight_layer import HighlightLayer
+from terrain_raster import render_terrain
+from map_renderer import MapRenderer
+from viewport import ViewportCuller
 # from voronoi import mirror_points
 
 class GameApp:
@@ -30,8 +36,21 @@ class GameApp:
 
         self.canvas = None  # To hold the tkinter canvas for Voronoi diagram
         self.points = None
-        self.vor = None
+        self.map = None
+        self.locator = None
+        self.highlight = None
         self.centroids = None
+        self.seed = None  # Fixed map seed, or None for a fresh map every game
+        self.map_cache = None  # MapCache reusing maps across restarts and replays, or None to regenerate every time
+        self.raster_terrain = False  # Draw the terrain as one pre-rendered image instead of vector polygons
+        self.terrain_image = None
+        self.renderer = None
+        self.tcl_script_drawing = False  # Draw each map layer with one Tcl script instead of one Tk call per item
+        self.map_scale = 1  # Map size as a multiple of the window; larger maps scroll and get map_scale ** 2 times the regions
+        self.viewport_culling = False  # Only keep canvas items for regions near the visible part of the map
+        self.viewport = None
+        self.generation_report = None  # GenerationReport of the current map
+        self.report_path = None  # JSON file to write each map's generation report to, if set
 
         self.regions = 120
         self.cities = 80
@@ -44,7 +63,7 @@ class GameApp:
         play_button = tk.Button(self.menu_frame, text="Play", command=self.start_game)
         play_button.pack(pady=20)
 
-    def start_game(self):
+    def start_game(self, seed=None):
         if self.game_frame:
             self.game_frame.destroy()
 
@@ -63,11 +82,12 @@ class GameApp:
         self.canvas = tk.Canvas(self.game_frame, width=self.game_width, height=self.game_height, bg='white')
         self.canvas.pack()
 
-        self.generate_voronoi()
+        self.generate_voronoi(seed)
         # self.build_terrain()
         self.canvas.bind("<Motion>", self.on_mouse_over)
         self.canvas.bind_all("<MouseWheel>", self.on_vertical_scroll)  # For Windows and MacOS
         self.canvas.bind_all("<Shift-MouseWheel>", self.on_horizontal_scroll)  # A common approach
+        self.canvas.bind("<Configure>", self.update_viewport)
 
         self.start_timer()
 
@@ -88,6 +108,7 @@ class GameApp:
         
         # Apply the vertical scroll
         self.canvas.yview_scroll(scroll_steps, "units")
+        self.update_viewport()
 
     def on_horizontal_scroll(self, event):
         # Check for platform
@@ -106,9 +127,14 @@ class GameApp:
 
         # Apply the horizontal scroll
         self.canvas.xview_scroll(scroll_steps, "units")
+        self.update_viewport()
 
     def restart_game(self):
-        self.start_game()
+        # With a map cache, restarting replays the current map straight from the cache
+        if self.map_cache is not None and self.map is not None:
+            self.start_game(seed=self.map.seed)
+        else:
+            self.start_game()
 
     def start_timer(self):
         self.start_time = time.time()
@@ -122,234 +148,32 @@ class GameApp:
         self.timer_label.config(text=f"Timer: {elapsed_time}")
         self.root.after(1000, self.update_timer)  # Update the timer every 1 second
 
-    def mirror_points(self, points, bounding_box):
-        """
-        Mirror points at the edges of the bounding box to ensure bounded Voronoi regions.
-        """
-        points_left = np.copy(points)
-        points_left[:, 0] = bounding_box[0] - (points_left[:, 0] - bounding_box[0])
-
-        points_right = np.copy(points)
-        points_right[:, 0] = bounding_box[1] + (bounding_box[1] - points_right[:, 0])
-
-        points_down = np.copy(points)
-        points_down[:, 1] = bounding_box[2] - (points_down[:, 1] - bounding_box[2])
-
-        points_up = np.copy(points)
-        points_up[:, 1] = bounding_box[3] + (bounding_box[3] - points_up[:, 1])
-
-        # Combine original and mirrored points
-        all_points = np.vstack([points, points_left, points_right, points_down, points_up])
-        
-        return all_points
-
-
-
-
-
-    def generate_voronoi(self):
-
-        distance_from_edge = 20
-        new_edge = 20
-        buffer_distance = 40
-
-        # Generate points inside the canvas, away from the edge
-        inner_points = np.random.rand(self.regions - 4, 2)
-        inner_points[:, 0] *= (self.game_width - 2 * distance_from_edge)
-        inner_points[:, 1] *= (self.game_height - 2 * distance_from_edge)
-        inner_points += distance_from_edge
-
-        # Generate additional buffer points closer to the edge
-        buffer_points = np.random.rand(self.regions // 2, 2)  # One third as many buffer points
-        buffer_points[:, 0] *= (self.game_width - 2 * buffer_distance)
-        buffer_points[:, 1] *= (self.game_height - 2 * buffer_distance)
-        buffer_points += buffer_distance
-
-        self.points = np.vstack([inner_points, buffer_points])
-        self.bounding_box = np.array([0., self.game_width, 0., self.game_height])
-
-        print("Points:", self.points)
-        print("Bounding box:", self.bounding_box)
-
-        self.points = self.mirror_points(self.points, self.bounding_box)
-        self.vor = Voronoi(self.points)
-
-        self.regions_data = {}
-
-        for region_index, region_vertices in enumerate(self.vor.regions):
-
-            if not region_vertices or -1 in region_vertices:  # Skip empty or infinite regions
-                continue
-
-            polygon = [self.vor.vertices[i] for i in region_vertices]
-            sandy_base = self.get_sandy_color()
-            centroid = np.mean(polygon, axis=0)
-
-            # Filter out distant regions
-            if any(x < (-100) or x >= (self.game_width + 200) for x, _ in polygon) or \
-                any(y < (-100) or y >= (self.game_height + 200) for _, y in polygon):
-                    continue
-            
-            # Set all initial data for each region to dict
-            self.regions_data[region_index] = {
-                "vertices": region_vertices,
-                "polygon": polygon,
-                "sandy_base": sandy_base,
-                "centroid": centroid,
-                "is_city": False,  # Will update this flag for cities
-                "city_coords": None,  # Will update for cities
-                "edge": False  # Will update for edge regions
-            }
-
-            # Check if the region is close to the edge
-            if any(x < new_edge or x >= (self.game_width - new_edge) for x, _ in polygon) or \
-                any(y < new_edge or y >= (self.game_height - new_edge) for _, y in polygon):
-                    self.regions_data[region_index].update({"edge": True})
-
-                    # Combine some edge regions into larger ones with neighbors
-
-                    continue
-            
-            # Decorate according to region type
-            self.playable_regions(polygon, centroid, sandy_base, 0.8, 5, tag="region")
-            # Set edge to False
-            self.regions_data[region_index].update({"edge": False})
-
-        # Merge edge regions and create mountains and oceans
-        self.merge_regions()
-        # self.merge_regions()
-
-        # Crown cities
-        valid_city_indices = [
-                i for i in range(len(self.points))
-                if self.vor.point_region[i] in self.regions_data and not self.regions_data[self.vor.point_region[i]].get("edge", False)]
-        self.centroids = np.random.choice(valid_city_indices, size=self.cities, replace=False)
-        for i in self.centroids:
-            # Ensure we have the right region index for each city
-            region_index = self.vor.point_region[i]
-            if region_index in self.regions_data:
-                x, y = self.points[i]
-                self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black')
-
-                # Update the data structure
-                self.regions_data[region_index].update({
-                    "is_city": True,
-                    "city_coords": (x, y)
-                })
-
-                # Add the index text
-                self.canvas.create_text(x + 10, y, text=str(region_index), font=("Arial", 8), tags="index")
-
-    def find_edge_region_neighbours(self):
-        neighbours = {}  # This will map each edge region index to its neighbours
-
-        # Iterate over all regions to find those that are marked as edge regions
-        for region_index, region_data in self.regions_data.items():
-            if region_data["edge"]:  # Ensure we're only considering edge regions
-                neighbours[region_index] = set()
-
-                # Now, find other regions that share vertices with this edge region
-                for other_index, other_data in self.regions_data.items():
-                    if other_index != region_index and other_data["edge"]:  # Avoid comparing the region to itself and ensure it's an edge region
-                        shared_vertices = set(region_data["vertices"]) & set(other_data["vertices"])
-                        
-                        # If they share at least two vertices, we consider them neighbours
-                        if len(shared_vertices) >= 2:
-                            neighbours[region_index].add(other_index)
-
-        return neighbours
-
-    def merge_polygons(self, region_index, neighbour_index):
-        # Assuming vertices are ordered correctly for Shapely to interpret
-        polygon1 = Polygon([self.vor.vertices[i] for i in self.regions_data[region_index]["vertices"]])
-        polygon2 = Polygon([self.vor.vertices[i] for i in self.regions_data[neighbour_index]["vertices"]])
-
-        # Use the union of the two polygons to merge them
-        merged_polygon_shape = polygon1.union(polygon2)
-
-        # Extract the exterior coordinates of the merged polygon
-        merged_polygon_coords = list(merged_polygon_shape.exterior.coords)
-
-        return merged_polygon_coords
-
-    def merge_regions(self):
-        # Find edge region neighbours
-        neighbours = self.find_edge_region_neighbours()
-        print("Edge region neighbours:", neighbours)
-
-        # Merge regions appropriately
-        merged_regions = set()
-        merged_polygons = {}  # Store the merged polygons to avoid recomputing them
-        for region_index, neighbour_indices in neighbours.items():
-            print("Processing region:", region_index)
-            if region_index in merged_regions:
-                print("Skipping region:", region_index, "as it has already been merged")
-                continue
-
-            valid_neighbour_found = False  # Flag to indicate if a valid neighbour has been found
-            for neighbour_index in neighbour_indices:
-                if neighbour_index in merged_regions or region_index == neighbour_index:
-                    print("Skipping neighbour:", neighbour_index, "as it has already been merged or is the same region")
-                    continue  # Skip if the neighbour has been merged or is the same region
-
-                valid_neighbour_found = True  # Valid neighbour found, set the flag to True
-                print("Valid neighbour found: Processing neighbour:", neighbour_index)
-                break  # Exit the loop since we only need one valid neighbour for merging
-
-            if valid_neighbour_found:
-                # Merge the regions
-                merged_vertices_indices = set(self.regions_data[region_index]["vertices"]) | set(self.regions_data[neighbour_index]["vertices"])
-                print("Merging regions:", region_index, neighbour_index)
-                print("Merging:", set(self.regions_data[region_index]["vertices"]) | set(self.regions_data[neighbour_index]["vertices"]))
-                
-                # Create a new polygon for the merged region
-                # merged_polygon = [self.vor.vertices[i] for i in merged_vertices_indices]
-                merged_polygon = self.merge_polygons(region_index, neighbour_index)
-                print("Merged polygon:", merged_polygon)
-
-                sandy_base = self.get_sandy_color()
-
-                # Update the region data
-                new_region_index = max(self.regions_data.keys()) + 1  # Create a new index for the merged region
-                self.regions_data[new_region_index] = {
-                    "vertices": list(merged_vertices_indices),
-                    "polygon": merged_polygon,
-                    "sandy_base": self.get_sandy_color(),  # Assuming a method to get color
-                    "centroid": None,  # Simplified calculation
-                    "is_city": False,
-                    "city_coords": None,
-                    "edge": True
-                }
-
-                merged_polygons[(region_index, neighbour_index)] = merged_polygon
-
-                # self.playable_regions(merged_polygon, new_centroid, sandy_base, 1, 5, tag="region")
-
-                # Mark original regions as merged
-                merged_regions.add(region_index)
-                merged_regions.add(neighbour_index)
-
-        # print("Merged polygons:", merged_polygons)
-        # self.playable_regions(merged_polygon, new_centroid, sandy_base, 1, 5, tag="region")
-
-        for region_index, region_data in self.regions_data.items():
-            if region_data["edge"]:
-                self.playable_regions(region_data["polygon"], region_data["centroid"], region_data["sandy_base"], 1, 5, tag="region")
-
-        # Find any lone edge regions that were not merged
-        for region_index, region_data in self.regions_data.items():
-            if region_data["edge"] and region_index not in merged_regions:
-
-                print("Lone edge region:", region_index)
-                polygon = region_data["polygon"]
-                centroid = region_data["centroid"]
-                sandy_base = region_data["sandy_base"]
-                # self.playable_regions(polygon, centroid, sandy_base, 1, 5, tag="region")
-        
-        # Remove the original regions from the canvas
-        for region_index in merged_regions:
-            print("Removing regions:", region_index)
-            del self.regions_data[region_index]
+    def generate_voronoi(self, seed=None):
+        seed = self.seed if seed is None else seed
+        # self.regions is per window's worth of map, so regions keep their size on a scaled-up map
+        regions = self.regions * self.map_scale ** 2
+        generator = MapGenerator(self.game_width * self.map_scale, self.game_height * self.map_scale, regions, self.cities, seed=seed)
+        self.map = self.map_cache.generate(generator) if self.map_cache is not None else generator.generate()
+        self.points = self.map.points
+        self.centroids = self.map.city_points
+        self.regions_data = self.map.regions_data()
+        self.locator = RegionLocator(self.map)
+        self.highlight = HighlightLayer(self.canvas)
+        self.renderer = MapRenderer(self.canvas, tcl_script=self.tcl_script_drawing)
+        self.viewport = None
+        if self.map_scale != 1:
+            self.canvas.configure(scrollregion=(0, 0, self.map.width, self.map.height))
+
+        with generator.report.stage("drawing"):
+            self.draw_terrain()
+
+            # Crown cities, with their index labels on a layer of their own above them
+            if self.viewport is None:  # The culler draws cities along with their regions
+                self.renderer.draw_cities(self.regions_data, city_tag="city", label_tag="index")
+
+        self.generation_report = generator.report
+        if self.report_path:
+            self.generation_report.to_json(self.report_path)
 
     def draw_overlapping_regions(self, overlapping_points):
         for region_index, intersection in overlapping_points.items():
@@ -374,99 +198,79 @@ class GameApp:
             adjusted_polygon.append((adjusted_x, adjusted_y))
         return adjusted_polygon
     
-    def playable_regions(self, polygon, centroid, sandy_base, opacity, width, tag=""):
-
-        if centroid is None:
-            centroid = np.mean(polygon, axis=0)
+    def terrain_layers(self):
+        # Region index -> (rings, palette, width): inland regions first, then the merged edge regions on top
+        layers = {region_index: (region_data["rings"], region_data["palette"][0.8], 5)
+                  for region_index, region_data in self.regions_data.items() if not region_data["edge"]}
+        layers.update({region_index: (region_data["rings"], region_data["palette"][1.0], 5)
+                       for region_index, region_data in self.regions_data.items() if region_data["edge"]})
+        return layers
+
+    def draw_terrain(self):
+        layers = self.terrain_layers()
+        if self.raster_terrain:
+            # The terrain never changes during a game, so draw it once into a single image item
+            image, (x, y) = render_terrain(list(layers.values()))
+            self.terrain_image = ImageTk.PhotoImage(image)  # Keep a reference or Tk drops the image
+            self.canvas.create_image(x, y, anchor=tk.NW, image=self.terrain_image, tags="region")
+        elif self.viewport_culling:
+            # Only regions near the visible part of the map get canvas items; scrolling adds and removes them
+            cities = {region_index: region_data["city_coords"]
+                      for region_index, region_data in self.regions_data.items() if region_data["is_city"]}
+            self.viewport = ViewportCuller(self.canvas, self.renderer, layers, cities, tag="region")
+            self.viewport.update()
+        else:
+            self.renderer.draw_regions(layers.values(), tag="region")
 
-        sandy_light = self.get_sandy_lighter_color(sandy_base, opacity)
-        sandy_outline = self.get_sandy_lighter_color(sandy_base, opacity - 0.3)
-        self.canvas.create_polygon(*np.ravel(polygon), outline=sandy_outline, fill=sandy_light, width=width, tags=f"{tag}")
+    def update_viewport(self, event=None):
+        if self.viewport is not None:
+            self.viewport.update()
 
-        sandy_light_2 = self.get_sandy_lighter_color(sandy_light, 1.1)
-        adjusted_polygon = [(p + centroid) / 2 for p in polygon]
-        self.canvas.create_polygon(*np.ravel(adjusted_polygon), outline='', fill=sandy_light_2, tags=f"{tag}")
+    def playable_regions(self, rings, palette, width, tag=""):
+        outline, inner_ring, innermost_ring = rings
+        sandy_light, sandy_outline, sandy_light_2, sandy_light_3 = palette
 
-        sandy_light_3 = self.get_sandy_lighter_color(sandy_light_2, 1.1)
-        adjusted_polygon = [(p + centroid) / 2 for p in adjusted_polygon]
-        self.canvas.create_polygon(*np.ravel(adjusted_polygon), outline='', fill=sandy_light_3, tags=f"{tag}")
+        return [
+            self.canvas.create_polygon(*outline, outline=sandy_outline, fill=sandy_light, width=width, tags=f"{tag}"),
+            self.canvas.create_polygon(*inner_ring, outline='', fill=sandy_light_2, tags=f"{tag}"),
+            self.canvas.create_polygon(*innermost_ring, outline='', fill=sandy_light_3, tags=f"{tag}")
+        ]
 
-    def get_sandy_color(self):
-        # Base sandy RGB values
-        base_r, base_g, base_b = 222, 184, 135  # RGB for #deb887
-        
-        # Standard deviation for variation
-        std_dev = 5
-        
-        # Apply Gaussian variation
-        r = int(random.gauss(base_r, std_dev))
-        g = int(random.gauss(base_g, std_dev))
-        b = int(random.gauss(base_b, std_dev))
-        
-        # Clamp values to valid RGB range
-        r = max(min(r, 255), 0)
-        g = max(min(g, 255), 0)
-        b = max(min(b, 255), 0)
-        
-        return f'#{r:02x}{g:02x}{b:02x}'
-
-    def get_sandy_lighter_color(self, colour, opacity):
+    def on_mouse_over(self, event):
+        closest_region_index = self.identify_region(event.x, event.y)
 
-        r, g, b = int(colour[1:3], 16), int(colour[3:5], 16), int(colour[5:7], 16)
+        # If the cursor is over a region, highlight it
+        if closest_region_index is not None:
+            self.highlight_region(closest_region_index)
+        else:
+            # If the cursor is off the map, hide any existing highlight
+            self.highlight.hide()
 
-        # Base sandy RGB values
-        r = int((1 - opacity) * 255 + opacity * r)
-        g = int((1 - opacity) * 255 + opacity * g)
-        b = int((1 - opacity) * 255 + opacity * b)
+    def identify_region(self, x, y):
+        # Event coordinates are window-relative; the map lives in canvas coordinates
+        return self.locator.locate(self.canvas.canvasx(x), self.canvas.canvasy(y))
 
-        # Clamp values to valid RGB range
-        r = max(min(r, 255), 0)
-        g = max(min(g, 255), 0)
-        b = max(min(b, 255), 0)
+    def highlight_region(self, region_index):
+        if region_index in self.regions_data:
+            self.highlight.show(region_index, lambda: self.draw_highlight(region_index))
+        else:
+            self.highlight.hide()
 
-        # Convert RGB back to hexadecimal
-        lighter_color = f'#{r:02x}{g:02x}{b:02x}'
-        return lighter_color
+    def draw_highlight(self, region_index):
+        region_info = self.regions_data[region_index]
+        rings = region_info['rings']  # Use the pre-computed outline and inner rings
+        palette = region_info['palette'][0.9]  # Use the pre-computed colours
 
-    def on_mouse_over(self, event):
-        x, y = event.x, event.y
-        min_distance = float('inf')
-        closest_region_index = None
-
-        # Iterate through regions_data to find the closest centroid
-        for region_index, region_info in self.regions_data.items():
-            if region_info['centroid'] is None:
-                continue
-            centroid = region_info['centroid']
-            distance = np.sqrt((centroid[0] - x) ** 2 + (centroid[1] - y) ** 2)
-            if distance < min_distance:
-                min_distance = distance
-                closest_region_index = region_index
-
-        # If a region is close enough, highlight its region
-        if closest_region_index is not None:  # Adjust threshold as needed
-            self.highlight_region(closest_region_index)
-        else:
-            # If no region is close enough, remove any existing highlight
-            self.canvas.delete("highlight")
+        # Highlight the region if playable
+        items = self.playable_regions(rings, palette, 1, tag="highlight")
 
-    def highlight_region(self, region_index):
-        self.canvas.delete("highlight")  # Remove any existing highlights
+        # Use city_coords location and draw oval
+        if region_info['is_city']:
+            x, y = region_info['city_coords']
+            items.append(self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black', tags="highlight"))
+            items.append(self.canvas.create_text(x + 10, y, text=str(region_index), font=("Arial", 8), tags="highlight"))
 
-        if region_index in self.regions_data:
-            region_info = self.regions_data[region_index]
-            polygon = region_info['polygon']  # Use the pre-computed polygon
-            sandy_base = region_info['sandy_base']
-            centroid = region_info['centroid']
-
-            # Highlight the region if playable
-            self.playable_regions(polygon, centroid, sandy_base, 0.9, 1, tag="highlight")
-
-            # Use city_coords location and draw oval
-            if region_info['is_city']:
-                x, y = region_info['city_coords']
-                self.canvas.create_oval(x - 2, y - 2, x + 2, y + 2, fill='black', tags="highlight")
-                self.canvas.create_text(x + 10, y, text=str(region_index), font=("Arial", 8), tags="index")
+        return items
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,54 @@
+import json
+import time
+from contextlib import contextmanager
+
+
+class GenerationReport:
+    """
+    Wall-clock time spent in each named stage of one map generation.
+
+    Stages are timed with the stage() context manager and kept in the order
+    they first ran; timing the same stage again adds to it. parameters holds
+    whatever describes the run (seed, size, region count), so reports from
+    different runs can be compared.
+    """
+
+    def __init__(self, **parameters):
+        self.parameters = parameters
+        self.stages = {}  # Stage name -> seconds
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def add(self, other):
+        """Add the stage times of another report to this one."""
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def as_dict(self):
+        return {
+            "parameters": self.parameters,
+            "stages_ms": {name: 1000 * seconds for name, seconds in self.stages.items()},
+            "total_ms": 1000 * self.total,
+        }
+
+    def to_json(self, path=None):
+        """The report as a JSON string, also written to path if given."""
+        text = json.dumps(self.as_dict(), indent=2, default=str)
+        if path is not None:
+            with open(path, "w") as report_file:
+                report_file.write(text + "\n")
+        return text
+
+    def __repr__(self):
+        stages = ", ".join(f"{name}={1000 * seconds:.1f}ms" for name, seconds in self.stages.items())
+        return f"GenerationReport({stages}, total={1000 * self.total:.1f}ms)"
@@ -0,0 +1,34 @@
+class HighlightLayer:
+    """
+    Hover overlay that reuses canvas items.
+
+    Each region's overlay items are created the first time it is hovered and
+    afterwards only shown or hidden, so moving the cursor does not create or
+    delete canvas items, and staying inside one region does no work at all.
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.items = {}  # Region index -> overlay item ids
+        self.current = None
+
+    def show(self, region_index, build):
+        """Highlight region_index; build() draws its overlay and returns the item ids on first use."""
+        if region_index == self.current:
+            return
+        self.hide()
+
+        items = self.items.get(region_index)
+        if items is None:
+            items = self.items[region_index] = build()
+        for item in items:
+            self.canvas.itemconfigure(item, state="normal")
+            self.canvas.tag_raise(item)
+        self.current = region_index
+
+    def hide(self):
+        if self.current is None:
+            return
+        for item in self.items[self.current]:
+            self.canvas.itemconfigure(item, state="hidden")
+        self.current = None
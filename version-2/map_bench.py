@@ -0,0 +1,189 @@
+"""
+Map generation benchmarks across region counts.
+
+Generates maps headlessly with MapGenerator for each region count and
+records the time of every generation stage (from GenerationReport), the
+memory blocks and bytes the finished map keeps alive and the peak while
+generating it (from tracemalloc, in a separate untimed run), and the number
+of objects and bytes in GameMap.regions_data(), the dict-of-dicts GameApp
+works with.
+
+    python map_bench.py --out map_bench.json
+    python map_bench.py --regions 100 1000 --repeat 3 --out small.json
+    python map_bench.py --compare before.json after.json
+
+The map side grows with sqrt(regions) (--spacing pixels per region) so
+regions keep roughly the size they have in the game. --compare prints the
+ratio of every stage time and size between two result files instead of
+running anything.
+"""
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from map_generator import MapGenerator, misplaced_seeds
+
+REGION_COUNTS = (100, 1000, 5000, 10000, 50000)
+
+
+def footprint(value, seen=None):
+    """
+    (objects, bytes) of value and everything it references, counting shared
+    objects once. Every int, float and string counts, not just containers.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0, 0
+    seen.add(id(value))
+
+    if isinstance(value, np.ndarray):
+        # getsizeof already includes the buffer of an array that owns it; a view only reports its header
+        return 1, sys.getsizeof(value)
+    objects, size = 1, sys.getsizeof(value)
+    if isinstance(value, dict):
+        children = [child for pair in value.items() for child in pair]
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        children = value
+    else:
+        children = ()
+    for child in children:
+        child_objects, child_size = footprint(child, seen)
+        objects += child_objects
+        size += child_size
+    return objects, size
+
+
+def new_generator(regions, seed, spacing, cities, merge_edges, sampling):
+    side = max(700, int(spacing * np.sqrt(regions)))
+    return MapGenerator(side, side, regions=regions, cities=cities, seed=seed, merge_edges=merge_edges,
+                        sampling=sampling)
+
+
+def measure(generator):
+    """One generation: stage times, plus the cost and footprint of its regions_data."""
+    game_map = generator.generate()
+
+    start = time.perf_counter()
+    regions_data = game_map.regions_data()
+    regions_data_seconds = time.perf_counter() - start
+    objects, size = footprint(regions_data)
+
+    return {
+        "side": generator.width,
+        "map_regions": len(game_map.regions),
+        "stages_ms": {name: 1000 * seconds for name, seconds in generator.report.stages.items()},
+        "total_ms": 1000 * generator.report.total,
+        "regions_data_ms": 1000 * regions_data_seconds,
+        "regions_data_objects": objects,
+        "regions_data_bytes": size,
+        "misplaced_seeds": len(misplaced_seeds(game_map)),
+    }
+
+
+def traced_generation(generator):
+    """
+    Memory blocks and bytes the finished GameMap keeps alive, and the peak
+    while generating it, from tracemalloc. Tracing slows allocation down, so
+    this is a separate, untimed generation.
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        game_map = generator.generate()
+        gc.collect()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    retained = after.compare_to(before, "filename")
+    del game_map
+    return {
+        "map_blocks": sum(stat.count_diff for stat in retained),
+        "map_bytes": sum(stat.size_diff for stat in retained),
+        "peak_bytes": peak,
+    }
+
+
+def run_case(regions, seed, spacing, cities, merge_edges, sampling, repeat):
+    """Best of repeat runs for every timing; sizes and counts come from the first run."""
+    parameters = (regions, seed, spacing, cities, merge_edges, sampling)
+    runs = [measure(new_generator(*parameters)) for _ in range(repeat)]
+    case = dict(runs[0], regions=regions)
+    case["stages_ms"] = {name: min(run["stages_ms"][name] for run in runs) for name in runs[0]["stages_ms"]}
+    case["total_ms"] = min(run["total_ms"] for run in runs)
+    case["regions_data_ms"] = min(run["regions_data_ms"] for run in runs)
+    case.update(traced_generation(new_generator(*parameters)))
+    return case
+
+
+def ratio(new, old):
+    return f"{new / old:6.2f}x" if old else "     -"
+
+
+def compare(old, new):
+    """Lines comparing two result files, matched by region count."""
+    previous = {case["regions"]: case for case in old["cases"]}
+    lines = []
+    for case in new["cases"]:
+        before = previous.get(case["regions"])
+        if before is None:
+            continue
+        lines.append(f"regions={case['regions']}")
+        for name, ms in case["stages_ms"].items():
+            old_ms = before["stages_ms"].get(name, 0.0)
+            lines.append(f"  {name:<20} {old_ms:12.1f} -> {ms:12.1f} ms{ratio(ms, old_ms)}")
+        for key in ("total_ms", "regions_data_ms", "map_blocks", "map_bytes", "peak_bytes", "regions_data_objects",
+                    "regions_data_bytes"):
+            if key in before:  # Older result files lack the newer metrics
+                lines.append(f"  {key:<20} {before[key]:12.1f} -> {case[key]:12.1f}   {ratio(case[key], before[key])}")
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark map generation at several region counts.")
+    parser.add_argument("--regions", nargs="+", type=int, default=list(REGION_COUNTS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cities", type=int, default=80)
+    parser.add_argument("--spacing", type=float, default=64, help="Map side in pixels per sqrt(region)")
+    parser.add_argument("--no-merge", dest="merge_edges", action="store_false", help="Skip merging edge regions")
+    parser.add_argument("--sampling", choices=("uniform", "poisson", "lloyd"), default="uniform")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per region count; timings keep the best")
+    parser.add_argument("--out", default="map_bench.json", help="JSON file for the results")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.compare:
+        old, new = (json.load(open(path)) for path in args.compare)
+        print("\n".join(compare(old, new)))
+        return
+
+    cases = []
+    for regions in args.regions:
+        case = run_case(regions, args.seed, args.spacing, args.cities, args.merge_edges, args.sampling, args.repeat)
+        cases.append(case)
+        stages = ", ".join(f"{name} {ms:.1f}" for name, ms in case["stages_ms"].items())
+        print(f"regions={regions:<6} {case['total_ms']:9.1f} ms  {case['map_blocks']:9d} blocks  "
+              f"{case['map_bytes'] / 2**20:7.2f} MiB map  {case['regions_data_objects']:9d} objects  "
+              f"{case['regions_data_bytes'] / 2**20:7.2f} MiB regions_data  ms: {stages}")
+        if case["misplaced_seeds"]:
+            print(f"regions={regions:<6} {case['misplaced_seeds']} seeds map to a region that does not contain them")
+
+    results = {"seed": args.seed, "merge_edges": args.merge_edges, "sampling": args.sampling, "spacing": args.spacing,
+               "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": cases}
+    with open(args.out, "w") as out_file:
+        json.dump(results, out_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
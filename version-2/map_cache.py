@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+from map_format import FORMAT_VERSION, MAP_SUFFIX, load_map, save_map
+
+# MapGenerator attributes that decide what it generates
+GENERATION_PARAMETERS = ("seed", "width", "height", "regions", "cities", "merge_edges",
+                         "distance_from_edge", "new_edge", "buffer_distance", "sampling", "lloyd_iterations")
+
+
+def cache_key(generator):
+    """Content address of the map a MapGenerator would produce: a hash of its parameters."""
+    parameters = {name: getattr(generator, name) for name in GENERATION_PARAMETERS}
+    parameters["format"] = FORMAT_VERSION
+    encoded = json.dumps(parameters, sort_keys=True, default=int).encode()
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+class MapCache:
+    """
+    Generated maps keyed by their generation parameters.
+
+    A small in-memory LRU of GameMap objects sits in front of an optional
+    bounded on-disk LRU of saved maps (see map_format). GameMaps are
+    immutable, so one cached map can be handed to any number of games.
+    On a hit, Voronoi, merging and city placement are skipped entirely.
+    """
+
+    def __init__(self, directory=None, memory_size=4, disk_size=64):
+        self.directory = directory
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.memory = OrderedDict()  # Key -> GameMap, least recently used first
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def generate(self, generator):
+        """generator.generate(), unless a map with the same parameters is cached."""
+        # A fresh report either way, so generator.report describes this call only
+        report = generator.report = generator.new_report()
+        with report.stage("cache"):
+            key = cache_key(generator)
+
+            game_map = self.memory.get(key)
+            if game_map is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return game_map
+
+            game_map = self.load(key)
+
+        if game_map is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            game_map = generator.generate()  # Starts its own report; the lookup time is carried over
+            generator.report.add(report)
+            with generator.report.stage("cache"):
+                self.store(key, game_map)
+
+        self.remember(key, game_map)
+        return game_map
+
+    def remember(self, key, game_map):
+        self.memory[key] = game_map
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + MAP_SUFFIX)
+
+    def load(self, key):
+        if not self.directory or not os.path.isfile(self.path(key)):
+            return None
+        try:
+            game_map = load_map(self.path(key))
+        except (OSError, ValueError):
+            # Unreadable or from an older format: drop it and regenerate
+            remove(self.path(key))
+            return None
+        os.utime(self.path(key))  # Mark as recently used
+        return game_map
+
+    def store(self, key, game_map):
+        if not self.directory:
+            return
+        # Write to a temporary file first so a half-written map is never picked up
+        descriptor, staging = tempfile.mkstemp(dir=self.directory, prefix=".staging-")
+        os.close(descriptor)
+        try:
+            save_map(staging, game_map)
+            os.replace(staging, self.path(key))
+        except OSError:
+            remove(staging)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Delete the least recently used maps on disk beyond disk_size."""
+        entries = [entry for entry in os.scandir(self.directory)
+                   if entry.is_file() and entry.name.endswith(MAP_SUFFIX) and not entry.name.startswith(".")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:max(0, len(entries) - self.disk_size)]:
+            remove(entry.path)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "in_memory": len(self.memory),
+        }
+
+
+def remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,81 @@
+"""
+Pre-bake a catalogue of maps in parallel.
+
+Seeds are fanned out over a process pool; each worker generates its maps
+with MapGenerator and writes each one straight to disk as a single map_format
+file (map_<seed>.map), so only a small result tuple ever crosses back to the
+parent process.
+
+    python map_catalogue.py maps/ --count 200 --workers 8 --start-seed 1000
+
+Prints overall throughput and maps/sec for every worker process.
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from map_format import MAP_SUFFIX, save_map
+from map_generator import MapGenerator
+
+
+def map_path(out_dir, seed):
+    return os.path.join(out_dir, f"map_{seed:08d}{MAP_SUFFIX}")
+
+
+def bake(out_dir, seed, options):
+    """Generate and save one map; returns (seed, worker pid, seconds spent)."""
+    start = time.perf_counter()
+    game_map = MapGenerator(seed=seed, **options).generate()
+    save_map(map_path(out_dir, seed), game_map)
+    return seed, os.getpid(), time.perf_counter() - start
+
+
+def bake_catalogue(out_dir, seeds, workers=None, **options):
+    """
+    Generate a map for every seed using a pool of worker processes.
+    Returns {pid: (maps, busy seconds)} and the total wall-clock time.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    per_worker = defaultdict(lambda: [0, 0.0])
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(bake, out_dir, seed, options) for seed in seeds]
+        for future in as_completed(futures):
+            _, pid, seconds = future.result()
+            per_worker[pid][0] += 1
+            per_worker[pid][1] += seconds
+    elapsed = time.perf_counter() - start
+
+    return {pid: tuple(counts) for pid, counts in per_worker.items()}, elapsed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a catalogue of maps in parallel.")
+    parser.add_argument("out_dir", help="Directory to write the maps to")
+    parser.add_argument("--count", type=int, default=100, help="Number of maps")
+    parser.add_argument("--start-seed", type=int, default=0, help="Seed of the first map; the rest follow on")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--width", type=int, default=1000)
+    parser.add_argument("--height", type=int, default=800)
+    parser.add_argument("--regions", type=int, default=120)
+    parser.add_argument("--cities", type=int, default=80)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    seeds = range(args.start_seed, args.start_seed + args.count)
+
+    per_worker, elapsed = bake_catalogue(args.out_dir, seeds, workers=args.workers, width=args.width,
+                                         height=args.height, regions=args.regions, cities=args.cities)
+
+    print(f"{args.count} maps in {elapsed:.2f}s ({args.count / elapsed:.1f} maps/sec) with {len(per_worker)} workers")
+    for pid, (maps, busy) in sorted(per_worker.items()):
+        print(f"  worker {pid}: {maps} maps, {maps / busy if busy else 0.0:.2f} maps/sec")
+
+
+if __name__ == "__main__":
+    main()
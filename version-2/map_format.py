@@ -0,0 +1,227 @@
+import json
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import numpy as np
+
+from adjacency import RegionAdjacency
+from map_generator import GameMap, Region
+from palette import PALETTE_OPACITIES, hex_to_rgb, palette_rgb
+
+# Bumped whenever the file layout or the set or meaning of the stored arrays changes
+FORMAT_VERSION = 2
+
+# File layout: MAGIC, then a little-endian uint32 format version and uint64
+# table length, then the JSON offset table, then each array's raw bytes
+MAGIC = b"VMAP"
+HEADER_BYTES = len(MAGIC) + 4 + 8
+MAP_SUFFIX = ".map"  # File extension of saved maps
+ALIGNMENT = 64  # Every array starts on a multiple of this, so its view is aligned
+
+
+def flatten(sequences, dtype, width=None):
+    """Concatenate a list of sequences into one flat array plus CSR-style offsets."""
+    counts = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    shape = (-1,) if width is None else (-1, width)
+    if not len(sequences) or not offsets[-1]:
+        return np.zeros((0,) + shape[1:], dtype=dtype), offsets
+    return np.concatenate([np.asarray(sequence, dtype=dtype).reshape(shape) for sequence in sequences]), offsets
+
+
+def to_arrays(game_map):
+    """
+    Flat arrays describing a GameMap, with no per-region Python objects.
+
+    Per-region variable-length data (Voronoi vertex indices, polygon
+    coordinates, inset rings) is stored as one flat buffer plus offsets, so
+    region k's slice is buffer[offsets[k]:offsets[k + 1]]. Base colours are
+    stored once in a small RGB table that regions index into, next to the
+    RGB of every palette colour derived from them, so nothing has to be
+    recomputed on load.
+    """
+    regions = list(game_map.regions.values())
+    region_vertices, region_vertex_offsets = flatten([region.vertices for region in regions], np.int64)
+    polygon_coords, polygon_offsets = flatten([region.polygon for region in regions], np.float64, width=2)
+    # The outline ring is the polygon itself; only the two inner rings are stored
+    inner_rings = np.array([flatten([region.rings[ring] for region in regions], np.float64)[0].reshape(-1, 2)
+                            for ring in (1, 2)])
+
+    colour_table, colour_index = np.unique(hex_to_rgb([region.sandy_base for region in regions]),
+                                           axis=0, return_inverse=True)
+
+    nan_pair = (np.nan, np.nan)
+    return {
+        "shape": np.array([game_map.seed, game_map.width, game_map.height], dtype=np.int64),
+        "points": np.asarray(game_map.points, dtype=np.float64),
+        "vertices": np.asarray(game_map.vertices, dtype=np.float64),
+        "point_region": np.asarray(game_map.point_region, dtype=np.int64),
+        "seed_region": np.asarray(game_map.seed_region, dtype=np.int64),
+        "city_points": np.asarray(game_map.city_points, dtype=np.int64),
+        "region_ids": np.fromiter(game_map.regions.keys(), dtype=np.int64, count=len(regions)),
+        "region_vertices": region_vertices,
+        "region_vertex_offsets": region_vertex_offsets,
+        "polygon_coords": polygon_coords,
+        "polygon_offsets": polygon_offsets,
+        "inner_rings": inner_rings,
+        "centroids": np.array([nan_pair if region.centroid is None else region.centroid for region in regions],
+                              dtype=np.float64).reshape(-1, 2),
+        "colour_table": colour_table.astype(np.uint8).reshape(-1, 3),
+        "palette_table": palette_rgb(colour_table.reshape(-1, 3)).astype(np.uint8),
+        "colour_index": colour_index.astype(np.int32).ravel(),
+        "edge": np.array([region.edge for region in regions], dtype=bool),
+        "is_city": np.array([region.is_city for region in regions], dtype=bool),
+        "city_coords": np.array([nan_pair if region.city_coords is None else region.city_coords for region in regions],
+                                dtype=np.float64).reshape(-1, 2),
+        "adjacency_indptr": np.asarray(game_map.adjacency.indptr, dtype=np.int64),
+        "adjacency_indices": np.asarray(game_map.adjacency.indices, dtype=np.int64),
+    }
+
+
+class StoredRegions(Mapping):
+    """
+    Read-only region index -> Region mapping over the flat arrays of to_arrays.
+
+    Nothing per region is built up front: a Region, with its palette strings
+    and ring tuples, is made from slices of the arrays the first time it is
+    looked up and kept from then on.
+    """
+
+    def __init__(self, arrays):
+        self.arrays = arrays
+        region_ids = arrays["region_ids"].tolist()
+        self.rows = dict(zip(region_ids, range(len(region_ids))))  # Region index -> row in the arrays
+        self.regions = {}
+        self.palettes = {}  # Row of palette_table -> palette, shared by regions of the same base colour
+        self.hex = {}  # (r, g, b) -> '#rrggbb', so equal colours share one string
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __contains__(self, region_index):
+        return region_index in self.rows
+
+    def __getitem__(self, region_index):
+        region = self.regions.get(region_index)
+        if region is None:
+            region = self.regions[region_index] = self.build(self.rows[region_index])
+        return region
+
+    def colour(self, rgb):
+        rgb = tuple(rgb)
+        string = self.hex.get(rgb)
+        if string is None:
+            string = self.hex[rgb] = "#{:02x}{:02x}{:02x}".format(*rgb)
+        return string
+
+    def palette(self, colour):
+        palette = self.palettes.get(colour)
+        if palette is None:
+            tiers = self.arrays["palette_table"][colour].tolist()
+            palette = self.palettes[colour] = MappingProxyType(
+                {opacity: tuple(map(self.colour, tier)) for opacity, tier in zip(PALETTE_OPACITIES, tiers)})
+        return palette
+
+    def build(self, k):
+        arrays = self.arrays
+        start, end = arrays["region_vertex_offsets"][k:k + 2].tolist()
+        vertices = tuple(arrays["region_vertices"][start:end].tolist())
+        start, end = arrays["polygon_offsets"][k:k + 2].tolist()
+        polygon = arrays["polygon_coords"][start:end]
+        inner_rings = arrays["inner_rings"][:, start:end]
+
+        colour = int(arrays["colour_index"][k])
+        centroid = arrays["centroids"][k]
+        is_city = bool(arrays["is_city"][k])
+        return Region(
+            vertices=vertices,
+            polygon=polygon,
+            sandy_base=self.colour(arrays["colour_table"][colour].tolist()),
+            palette=self.palette(colour),
+            rings=(tuple(polygon.ravel().tolist()),) + tuple(tuple(ring.ravel().tolist()) for ring in inner_rings),
+            centroid=None if np.isnan(centroid).any() else centroid,
+            is_city=is_city,
+            city_coords=tuple(arrays["city_coords"][k].tolist()) if is_city else None,
+            edge=bool(arrays["edge"][k])
+        )
+
+
+def from_arrays(arrays):
+    """GameMap over the arrays written by to_arrays, sharing them without copying."""
+    # Plain ndarray views of any memory maps: still no copy, but much cheaper to slice
+    arrays = {name: np.asarray(array) for name, array in arrays.items()}
+    for array in arrays.values():
+        array.setflags(write=False)
+
+    seed, width, height = arrays["shape"].tolist()
+    return GameMap(
+        seed=seed,
+        width=width,
+        height=height,
+        points=arrays["points"],
+        vertices=arrays["vertices"],
+        point_region=arrays["point_region"],
+        seed_region=arrays["seed_region"],
+        regions=StoredRegions(arrays),
+        city_points=arrays["city_points"],
+        adjacency=RegionAdjacency(arrays["adjacency_indptr"], arrays["adjacency_indices"])
+    )
+
+
+def save_map(path, game_map):
+    """
+    Write game_map to one uncompressed file: a header, a JSON table of where
+    each array starts plus its dtype and shape, then the raw array bytes.
+    Nothing is compressed, so loading can memory map the file and view the
+    arrays in place.
+    """
+    arrays = to_arrays(game_map)
+    table = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        table[name] = {"offset": offset, "dtype": array.dtype.str, "shape": array.shape}
+        offset += array.nbytes
+    encoded = json.dumps(table).encode()
+    data_start = -(-(HEADER_BYTES + len(encoded)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, "wb") as map_file:
+        map_file.write(MAGIC + np.array([FORMAT_VERSION], "<u4").tobytes() + np.array([len(encoded)], "<u8").tobytes())
+        map_file.write(encoded)
+        for name, array in arrays.items():
+            map_file.seek(data_start + table[name]["offset"])
+            map_file.write(np.ascontiguousarray(array).tobytes())
+
+
+def load_map(path, mmap=True):
+    """
+    Load a map written by save_map. With mmap the arrays are read-only views
+    of the file on disk; either way regions are only built when looked up.
+    """
+    with open(path, "rb") as map_file:
+        header = map_file.read(HEADER_BYTES)
+        if len(header) < HEADER_BYTES or header[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not a saved map")
+        version = int(np.frombuffer(header, "<u4", 1, len(MAGIC))[0])
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path}: map format {version}, expected {FORMAT_VERSION}")
+        table = json.loads(map_file.read(int(np.frombuffer(header, "<u8", 1, len(MAGIC) + 4)[0])))
+        data_start = -(-map_file.tell() // ALIGNMENT) * ALIGNMENT
+
+        if mmap:
+            buffer = np.memmap(map_file, dtype=np.uint8, mode="r")
+        else:
+            map_file.seek(0)
+            buffer = np.frombuffer(map_file.read(), dtype=np.uint8)
+
+    arrays = {}
+    for name, entry in table.items():
+        dtype = np.dtype(entry["dtype"])
+        start = data_start + entry["offset"]
+        count = int(np.prod(entry["shape"]))
+        arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+    return from_arrays(arrays)
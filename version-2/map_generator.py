@@ -0,0 +1,398 @@
+import logging
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import NamedTuple
+
+import numpy as np
+import shapely
+from scipy.spatial import Voronoi
+from shapely.geometry import Polygon
+
+from adjacency import RegionAdjacency
+from generation_report import GenerationReport
+from palette import build_palettes
+from sampling import lloyd_relax, mirror_points, poisson_disk_count
+
+
+logger = logging.getLogger(__name__)
+
+
+class Region(NamedTuple):
+    vertices: tuple
+    polygon: np.ndarray
+    sandy_base: str
+    palette: dict  # Opacity -> (fill, outline, inner ring 1, inner ring 2) colours
+    rings: tuple  # Flat (x0, y0, x1, y1, ...) coordinates of the outline and both inner rings
+    centroid: np.ndarray  # None for merged edge regions
+    is_city: bool
+    city_coords: tuple
+    edge: bool
+
+
+class GameMap(NamedTuple):
+    """
+    A generated map. Arrays are read-only and regions is a read-only mapping,
+    so one map can be shared between games, threads and processes.
+    """
+    seed: int
+    width: int
+    height: int
+    points: np.ndarray  # Seed points, including the mirrored copies
+    vertices: np.ndarray  # Voronoi vertices
+    point_region: np.ndarray  # Voronoi region index of each seed point
+    seed_region: np.ndarray  # Region index each seed point ended up in after merging, or -1
+    regions: Mapping  # Region index -> Region; a MappingProxyType, or built on lookup for loaded maps
+    city_points: np.ndarray  # Indices into points of the seeds crowned as cities
+    adjacency: RegionAdjacency  # Which regions share a border, for merging, attack range and pathing
+
+    def regions_data(self):
+        """Mutable dict-of-dicts copy of the regions, in the layout GameApp works with."""
+        return {region_index: region._asdict() for region_index, region in self.regions.items()}
+
+
+def frozen(array):
+    # Arrays that are already read-only (e.g. memory-mapped from a saved map) are shared, not copied
+    if isinstance(array, np.ndarray) and not array.flags.writeable:
+        return array
+    array = np.array(array)
+    array.setflags(write=False)
+    return array
+
+
+class MapGenerator:
+    """
+    Deterministic, headless Voronoi map generation.
+
+    The same (seed, width, height, regions, cities) always produces the same
+    map. Nothing here touches Tk; GameApp draws the returned GameMap.
+    """
+
+    def __init__(self, width, height, regions=120, cities=80, seed=None, merge_edges=True,
+                 distance_from_edge=20, new_edge=20, buffer_distance=40, sampling="uniform", lloyd_iterations=2):
+        self.width = width
+        self.height = height
+        self.regions = regions
+        self.cities = cities
+        self.seed = int(np.random.SeedSequence().entropy % 2**32) if seed is None else seed
+        self.merge_edges = merge_edges
+
+        self.distance_from_edge = distance_from_edge
+        self.new_edge = new_edge
+        self.buffer_distance = buffer_distance
+
+        # How seed points are placed: "uniform" random, "poisson" disk (blue noise) or uniform then "lloyd" relaxed
+        if sampling not in ("uniform", "poisson", "lloyd"):
+            raise ValueError(f"Unknown sampling {sampling!r}")
+        self.sampling = sampling
+        self.lloyd_iterations = lloyd_iterations
+
+        # Per-stage timings of the last generate() call; callers may add stages of their own
+        self.report = self.new_report()
+
+    def new_report(self):
+        return GenerationReport(seed=self.seed, width=self.width, height=self.height, regions=self.regions,
+                                cities=self.cities, merge_edges=self.merge_edges, sampling=self.sampling)
+
+    def generate(self):
+        rng = np.random.default_rng(self.seed)
+        self.report = report = self.new_report()
+
+        with report.stage("sampling"):
+            points = self.sample_points(rng)
+        bounding_box = np.array([0., self.width, 0., self.height])
+
+        logger.debug("Points: %s", points)
+        logger.debug("Bounding box: %s", bounding_box)
+
+        with report.stage("mirroring"):
+            points = mirror_points(points, bounding_box)
+        with report.stage("voronoi"):
+            vor = Voronoi(points)
+
+        with report.stage("filtering"):
+            regions_data = self.classify_regions(vor, rng)
+        with report.stage("adjacency"):
+            adjacency = RegionAdjacency.from_voronoi(vor, regions_data.keys())
+        with report.stage("merging"):
+            # Decided before merging: merged regions get new indices, never those of filtered-out cells
+            kept = np.isin(vor.point_region, list(regions_data))
+            merged_into = self.merge_regions(vor, regions_data, adjacency, rng) if self.merge_edges else {}
+            adjacency = adjacency.relabel(merged_into)
+
+            # Final region of every seed point, -1 where its cell was filtered out
+            seed_region = np.array([merged_into.get(r, r) for r in vor.point_region.tolist()])
+            seed_region[~kept] = -1
+
+        with report.stage("cities"):
+            city_points = self.crown_cities(points, vor, regions_data, rng)
+
+        with report.stage("assembling"):
+            game_map = assemble_map(self.seed, self.width, self.height, points, vor.vertices, vor.point_region,
+                                    seed_region, regions_data, city_points, adjacency)
+        logger.debug("%s", report)
+        return game_map
+
+    def sample_points(self, rng):
+        distance_from_edge = self.distance_from_edge
+        buffer_distance = self.buffer_distance
+
+        if self.sampling != "uniform":
+            # As many points as the uniform inner and buffer batches together, evenly spaced. They stay
+            # buffer_distance from the edge: spread evenly out to distance_from_edge, a whole row of
+            # small cells lines the border, and those cells all become edge regions to merge
+            count = self.regions - 4 + self.regions // 2
+            bounds = (buffer_distance, buffer_distance, self.width - buffer_distance, self.height - buffer_distance)
+            if self.sampling == "poisson":
+                return poisson_disk_count(rng, bounds, count)
+            points = rng.random((count, 2)) * (bounds[2] - bounds[0], bounds[3] - bounds[1]) + bounds[:2]
+            return lloyd_relax(points, bounds, self.lloyd_iterations)
+
+        # Generate points inside the canvas, away from the edge
+        inner_points = rng.random((self.regions - 4, 2))
+        inner_points[:, 0] *= (self.width - 2 * distance_from_edge)
+        inner_points[:, 1] *= (self.height - 2 * distance_from_edge)
+        inner_points += distance_from_edge
+
+        # Generate additional buffer points closer to the edge
+        buffer_points = rng.random((self.regions // 2, 2))  # Half as many buffer points
+        buffer_points[:, 0] *= (self.width - 2 * buffer_distance)
+        buffer_points[:, 1] *= (self.height - 2 * buffer_distance)
+        buffer_points += buffer_distance
+
+        return np.vstack([inner_points, buffer_points])
+
+    def classify_regions(self, vor, rng):
+        """
+        Initial data for every finite Voronoi region that is not far outside the map.
+
+        The bounds tests run once per Voronoi vertex; per-region flags are then
+        reduced over a flat region -> vertex index with logical_or.reduceat, and
+        centroids come from one segmented sum over the same index.
+        """
+        new_edge = self.new_edge
+
+        # Skip empty or infinite regions
+        region_indices = [region_index for region_index, region_vertices in enumerate(vor.regions)
+                          if region_vertices and -1 not in region_vertices]
+        if not region_indices:
+            return {}
+        region_vertices = [vor.regions[region_index] for region_index in region_indices]
+        counts = np.array([len(vertices) for vertices in region_vertices])
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        flat = np.concatenate(region_vertices)
+
+        x, y = vor.vertices[:, 0], vor.vertices[:, 1]
+        distant = (x < -100) | (x >= self.width + 200) | (y < -100) | (y >= self.height + 200)
+        near_edge = (x < new_edge) | (x >= self.width - new_edge) | (y < new_edge) | (y >= self.height - new_edge)
+
+        region_distant = np.logical_or.reduceat(distant[flat], starts)
+        region_edge = np.logical_or.reduceat(near_edge[flat], starts)
+        centroids = np.add.reduceat(vor.vertices[flat], starts) / counts[:, None]
+
+        # Every finite region draws a colour, kept or not, so the random stream matches the map's seed
+        sandy_bases = sandy_colors(rng, len(region_indices))
+
+        # Set all initial data for each region to dict, filtering out distant regions
+        regions_data = {}
+        for k in np.flatnonzero(~region_distant).tolist():
+            polygon = vor.vertices[flat[starts[k]:starts[k] + counts[k]]]
+            regions_data[region_indices[k]] = {
+                "vertices": region_vertices[k],
+                "polygon": polygon,
+                "sandy_base": sandy_bases[k],
+                "centroid": centroids[k],
+                "is_city": False,  # Will update this flag for cities
+                "city_coords": None,  # Will update for cities
+                "edge": bool(region_edge[k])
+            }
+
+        return regions_data
+
+    def find_edge_region_neighbours(self, regions_data, adjacency):
+        # Map each edge region index to the edge regions it shares a ridge with
+        is_edge = np.zeros(adjacency.size, dtype=bool)
+        is_edge[[region_index for region_index, region_data in regions_data.items() if region_data["edge"]]] = True
+
+        neighbours = {}
+        for region_index, region_data in regions_data.items():
+            if region_data["edge"]:
+                candidates = adjacency.neighbours(region_index)
+                neighbours[region_index] = candidates[is_edge[candidates]].tolist()
+
+        return neighbours
+
+    def merge_polygons(self, vor, regions_data, region_index, neighbour_index):
+        # Assuming vertices are ordered correctly for Shapely to interpret
+        polygon1 = Polygon([vor.vertices[i] for i in regions_data[region_index]["vertices"]])
+        polygon2 = Polygon([vor.vertices[i] for i in regions_data[neighbour_index]["vertices"]])
+
+        # Use the union of the two polygons to merge them
+        merged_polygon_shape = polygon1.union(polygon2)
+
+        # Extract the exterior coordinates of the merged polygon
+        merged_polygon_coords = list(merged_polygon_shape.exterior.coords)
+
+        return merged_polygon_coords
+
+    def merge_regions(self, vor, regions_data, adjacency, rng):
+        # Find edge region neighbours
+        neighbours = self.find_edge_region_neighbours(regions_data, adjacency)
+        logger.debug("Edge region neighbours: %s", neighbours)
+
+        # Merge regions appropriately
+        merged_regions = set()
+        merged_into = {}  # Original region index -> index of the merged region replacing it
+        next_region_index = len(vor.regions)  # Past every Voronoi region index, kept or filtered out
+        for region_index, neighbour_indices in neighbours.items():
+            logger.debug("Processing region: %s", region_index)
+            if region_index in merged_regions:
+                logger.debug("Skipping region: %s as it has already been merged", region_index)
+                continue
+
+            valid_neighbour_found = False  # Flag to indicate if a valid neighbour has been found
+            for neighbour_index in neighbour_indices:
+                if neighbour_index in merged_regions or region_index == neighbour_index:
+                    logger.debug("Skipping neighbour: %s as it has already been merged or is the same region", neighbour_index)
+                    continue  # Skip if the neighbour has been merged or is the same region
+
+                valid_neighbour_found = True  # Valid neighbour found, set the flag to True
+                logger.debug("Valid neighbour found: Processing neighbour: %s", neighbour_index)
+                break  # Exit the loop since we only need one valid neighbour for merging
+
+            if valid_neighbour_found:
+                # Merge the regions
+                merged_vertices_indices = set(regions_data[region_index]["vertices"]) | set(regions_data[neighbour_index]["vertices"])
+                logger.debug("Merging regions: %s %s", region_index, neighbour_index)
+
+                # Create a new polygon for the merged region
+                merged_polygon = self.merge_polygons(vor, regions_data, region_index, neighbour_index)
+                logger.debug("Merged polygon: %s", merged_polygon)
+
+                # Update the region data
+                new_region_index = next_region_index  # Create a new index for the merged region
+                next_region_index += 1
+                regions_data[new_region_index] = {
+                    "vertices": list(merged_vertices_indices),
+                    "polygon": merged_polygon,
+                    "sandy_base": sandy_color(rng),
+                    "centroid": None,  # Simplified calculation
+                    "is_city": False,
+                    "city_coords": None,
+                    "edge": True
+                }
+
+                # Mark original regions as merged
+                merged_regions.add(region_index)
+                merged_regions.add(neighbour_index)
+                merged_into[region_index] = merged_into[neighbour_index] = new_region_index
+
+        # Remove the original regions
+        for region_index in merged_regions:
+            logger.debug("Removing regions: %s", region_index)
+            del regions_data[region_index]
+
+        return merged_into
+
+    def crown_cities(self, points, vor, regions_data, rng):
+        valid_city_indices = [
+                i for i in range(len(points))
+                if vor.point_region[i] in regions_data and not regions_data[vor.point_region[i]]["edge"]]
+        city_points = rng.choice(valid_city_indices, size=min(self.cities, len(valid_city_indices)), replace=False)
+
+        for i in city_points:
+            x, y = points[i]
+            regions_data[vor.point_region[i]].update({
+                "is_city": True,
+                "city_coords": (x, y)
+            })
+
+        return city_points
+
+
+def assemble_map(seed, width, height, points, vertices, point_region, seed_region, regions_data, city_points, adjacency):
+    """Freeze generated (or loaded) map data into a GameMap, deriving each region's palette and rings."""
+    palettes = build_palettes([region["sandy_base"] for region in regions_data.values()])
+    rings = inset_rings([region["polygon"] for region in regions_data.values()],
+                        [region["centroid"] for region in regions_data.values()])
+
+    regions = {region_index: Region(
+        vertices=tuple(region["vertices"]),
+        polygon=frozen(region["polygon"]),
+        sandy_base=region["sandy_base"],
+        palette=MappingProxyType(palette),
+        rings=region_rings,
+        centroid=None if region["centroid"] is None else frozen(region["centroid"]),
+        is_city=region["is_city"],
+        city_coords=region["city_coords"],
+        edge=region["edge"]
+    ) for (region_index, region), palette, region_rings in zip(regions_data.items(), palettes, rings)}
+
+    return GameMap(
+        seed=seed,
+        width=width,
+        height=height,
+        points=frozen(points),
+        vertices=frozen(vertices),
+        point_region=frozen(point_region),
+        seed_region=frozen(seed_region),
+        regions=MappingProxyType(regions),
+        city_points=frozen(city_points),
+        adjacency=adjacency
+    )
+
+
+def misplaced_seeds(game_map):
+    """
+    Indices of seed points whose seed_region is wrong: a region that does not
+    contain the seed. Seeds mapped to -1 are not checked. Empty for a sound map.
+    """
+    seeds = np.flatnonzero(game_map.seed_region >= 0)
+    polygons = [Polygon(game_map.regions[region_index].polygon)
+                for region_index in game_map.seed_region[seeds].tolist()]
+    points = game_map.points[seeds]
+    inside = shapely.intersects_xy(polygons, points[:, 0], points[:, 1]) if len(seeds) else np.zeros(0, dtype=bool)
+    return seeds[~inside]
+
+
+def inset_rings(polygons, centroids):
+    """
+    Outline plus two inset rings for every polygon, computed in one pass over
+    a flat vertex buffer. Each ring is the previous one pulled halfway towards
+    the centroid; a centroid of None means the mean of the polygon's vertices.
+    Returns one (outline, ring 1, ring 2) tuple of flat coordinate tuples per polygon.
+    """
+    counts = np.array([len(polygon) for polygon in polygons])
+    if len(counts) == 0:
+        return []
+    vertices = np.concatenate([np.asarray(polygon, dtype='float64').reshape(-1, 2) for polygon in polygons])
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    # Fill in missing centroids with the vertex mean of their polygon
+    centres = np.add.reduceat(vertices, offsets[:-1]) / counts[:, None]
+    for k, centroid in enumerate(centroids):
+        if centroid is not None:
+            centres[k] = centroid
+
+    per_vertex_centre = np.repeat(centres, counts, axis=0)
+    ring_1 = (vertices + per_vertex_centre) / 2
+    ring_2 = (ring_1 + per_vertex_centre) / 2
+
+    # Split each ring back into one flat coordinate tuple per polygon
+    bounds = 2 * offsets
+    flat = [ring.ravel().tolist() for ring in (vertices, ring_1, ring_2)]
+    return [tuple(tuple(coordinates[start:end]) for coordinates in flat)
+            for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def sandy_color(rng):
+    return sandy_colors(rng, 1)[0]
+
+
+def sandy_colors(rng, count):
+    # Base sandy RGB values
+    base = np.array([222, 184, 135])  # RGB for #deb887
+
+    # Apply Gaussian variation, then clamp values to valid RGB range
+    rgb = np.clip(rng.normal(base, 5, size=(count, 3)).astype(int), 0, 255)
+
+    return [f'#{r:02x}{g:02x}{b:02x}' for r, g, b in rgb.tolist()]
@@ -0,0 +1,68 @@
+class MapRenderer:
+    """
+    Draws a finished map onto a Tk canvas in batched passes.
+
+    Every item of a layer is prepared up front as a (kind, coordinates,
+    options) triple with its Tk options already flattened. The layer is then
+    issued either as one tight loop of tk.call, skipping tkinter's per-call
+    option handling, or, with tcl_script, as one Tcl script evaluated in a
+    single crossing into Tcl. Items keep the stacking order of the layers.
+    """
+
+    def __init__(self, canvas, tcl_script=False):
+        self.canvas = canvas
+        self.tcl_script = tcl_script
+        self.path = str(canvas)  # Tcl command name of the canvas widget
+
+    def region_items(self, layers, tag="region"):
+        """Outline and both inner rings of every (rings, palette, width) layer, in drawing order."""
+        items = []
+        for (outline, inner_ring, innermost_ring), (fill, outline_colour, ring_fill, innermost_fill), width in layers:
+            items.append(("polygon", outline, ("-outline", outline_colour, "-fill", fill, "-width", width, "-tags", tag)))
+            items.append(("polygon", inner_ring, ("-outline", "", "-fill", ring_fill, "-tags", tag)))
+            items.append(("polygon", innermost_ring, ("-outline", "", "-fill", innermost_fill, "-tags", tag)))
+        return items
+
+    def city_items(self, regions_data, city_tag="city", label_tag="index"):
+        """A dot and an index label for every city, as two separate layers."""
+        cities, labels = [], []
+        for region_index, region_data in regions_data.items():
+            if region_data["is_city"]:
+                x, y = region_data["city_coords"]
+                cities.append(("oval", (x - 2, y - 2, x + 2, y + 2), ("-fill", "black", "-tags", city_tag)))
+                labels.append(("text", (x + 10, y), ("-text", str(region_index), "-font", "Arial 8", "-tags", label_tag)))
+        return cities, labels
+
+    def draw_regions(self, layers, tag="region"):
+        self.draw(self.region_items(layers, tag))
+
+    def draw_cities(self, regions_data, city_tag="city", label_tag="index"):
+        cities, labels = self.city_items(regions_data, city_tag, label_tag)
+        self.draw(cities)
+        self.draw(labels)
+
+    def draw(self, items):
+        if not items:
+            return
+        if self.tcl_script:
+            self.canvas.tk.eval(self.script(items))
+            return
+        self.create(items)
+
+    def create(self, items):
+        """Create the items one Tk call each and return their canvas ids."""
+        call = self.canvas.tk.call
+        path = self.path
+        return [call(path, "create", kind, *coordinates, *options) for kind, coordinates, options in items]
+
+    def script(self, items):
+        """One Tcl script creating every item, one command per line."""
+        path = self.path
+        return "\n".join(
+            f"{path} create {kind} {' '.join([repr(float(c)) for c in coordinates])} {' '.join(map(tcl_word, options))}"
+            for kind, coordinates, options in items)
+
+
+def tcl_word(value):
+    # Braces keep empty strings and strings with spaces as one word; numbers go as they are
+    return "{" + value + "}" if isinstance(value, str) else repr(value)
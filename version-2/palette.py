@@ -0,0 +1,63 @@
+import sys
+
+import numpy as np
+
+# Opacity tiers the map is drawn with: inland regions, hover highlight and edge regions
+PALETTE_OPACITIES = (0.8, 0.9, 1.0)
+
+# The two inner rings are each this much deeper than the ring around them
+RING_OPACITY = 1.1
+
+
+def hex_to_rgb(colours):
+    """(N, 3) int array from a sequence of '#rrggbb' strings."""
+    return np.array([[int(colour[1:3], 16), int(colour[3:5], 16), int(colour[5:7], 16)] for colour in colours], dtype=int).reshape(-1, 3)
+
+
+def blend(rgb, opacity):
+    """Blend colours towards white (opacity < 1) or deepen them (opacity > 1), clamped to valid RGB."""
+    return np.clip(np.trunc((1 - opacity) * 255 + opacity * rgb), 0, 255).astype(int)
+
+
+def rgb_to_hex(rgb, interned=None):
+    """'#rrggbb' strings for an (N, 3) array; equal colours share one interned string."""
+    interned = {} if interned is None else interned
+    # Format each distinct colour once, then fan the strings back out
+    packed = (np.asarray(rgb, dtype=np.int64).reshape(-1, 3) * [1 << 16, 1 << 8, 1]).sum(axis=1)
+    keys, inverse = np.unique(packed, return_inverse=True)
+    strings = []
+    for key in keys.tolist():
+        if key not in interned:
+            interned[key] = sys.intern(f'#{key:06x}')
+        strings.append(interned[key])
+    return [strings[k] for k in inverse.ravel().tolist()]
+
+
+def palette_rgb(base, opacities=PALETTE_OPACITIES):
+    """
+    (N, len(opacities), 4, 3) int array of the (fill, outline, inner ring 1,
+    inner ring 2) colours of each (N, 3) RGB base colour at every opacity.
+    """
+    base = np.asarray(base, dtype=int).reshape(-1, 3)
+    tiers = []
+    for opacity in opacities:
+        fill = blend(base, opacity)
+        outline = blend(base, opacity - 0.3)
+        ring_1 = blend(fill, RING_OPACITY)
+        ring_2 = blend(ring_1, RING_OPACITY)
+        tiers.append(np.stack([fill, outline, ring_1, ring_2], axis=1))
+    return np.stack(tiers, axis=1)
+
+
+def build_palettes(base_colours, opacities=PALETTE_OPACITIES):
+    """
+    Every colour a region is drawn with, worked out once for all regions.
+
+    Returns one dict per base colour mapping each opacity to a
+    (fill, outline, inner ring 1, inner ring 2) tuple of hex strings.
+    """
+    rgb = palette_rgb(hex_to_rgb(base_colours), opacities)
+    strings = rgb_to_hex(rgb)  # Equal colours share one interned string
+    per_tier = len(opacities) * 4
+    return [dict(zip(opacities, zip(*[iter(strings[start:start + per_tier])] * 4)))
+            for start in range(0, len(strings), per_tier)]
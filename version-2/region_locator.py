@@ -0,0 +1,21 @@
+from scipy.spatial import cKDTree
+
+
+class RegionLocator:
+    """
+    Point location for a GameMap.
+
+    A point lies in the Voronoi cell of its nearest seed, so a KD-tree over
+    the seed points answers "which region is under the cursor" exactly in
+    O(log n), without scanning the regions.
+    """
+
+    def __init__(self, game_map):
+        self.tree = cKDTree(game_map.points)
+        self.seed_region = game_map.seed_region
+
+    def locate(self, x, y):
+        """Region index containing (x, y), or None if that cell is not part of the map."""
+        _, seed = self.tree.query((x, y))
+        region_index = self.seed_region[seed]
+        return None if region_index < 0 else int(region_index)
@@ -0,0 +1,137 @@
+import numpy as np
+from scipy.spatial import Voronoi
+
+# Cells around a candidate's cell that can hold a point closer than the radius (cells are radius / sqrt(2)
+# wide), nearest block first: most rejections come from there, so the outer ring is only checked for survivors
+INNER_CELLS = np.array([(dx, dy) for dx in range(-1, 2) for dy in range(-1, 2)])
+OUTER_CELLS = np.array([(dx, dy) for dx in range(-2, 3) for dy in range(-2, 3)
+                        if max(abs(dx), abs(dy)) == 2 and abs(dx) + abs(dy) < 4])
+
+
+def poisson_disk(rng, bounds, radius, rounds=1, points=None):
+    """
+    Blue-noise points in bounds = (x0, y0, x1, y1), no two closer than radius.
+
+    Dart throwing on a background grid with cells radius / sqrt(2) wide,
+    which each hold at most one point. Cells are split into nine phase
+    groups by (column % 3, row % 3); candidates in one group are at least
+    two cells apart, so they cannot clash with each other. Each round
+    throws one candidate into every empty cell of each group in turn and
+    keeps those with no point within radius, all as array operations.
+    points are already placed points, at least radius apart, to build on.
+    """
+    x0, y0, x1, y1 = bounds
+    cell = radius / np.sqrt(2)
+    columns, rows = int(np.ceil((x1 - x0) / cell)), int(np.ceil((y1 - y0) / cell))
+    origin = np.array([x0, y0])
+    high = np.array([x1, y1])
+
+    # A point at infinity in the last row: empty cells (-1) point at it, and it is never too close
+    points = np.zeros((0, 2)) if points is None else points
+    count = len(points)
+    points = np.vstack([points, [(np.inf, np.inf)]])
+
+    # Two cells of padding on every side, so neighbourhood lookups never go out of range
+    grid = np.full((columns + 4, rows + 4), -1, dtype=np.int64)
+    placed = ((points[:count] - origin) // cell).astype(int) + 2
+    grid[placed[:, 0], placed[:, 1]] = np.arange(count)
+
+    cells = np.stack(np.meshgrid(np.arange(columns), np.arange(rows), indexing='ij'), axis=-1).reshape(-1, 2)
+    phases = [cells[(cells[:, 0] % 3 == a) & (cells[:, 1] % 3 == b)] for a in range(3) for b in range(3)]
+
+    def fits(phase, candidates, block):
+        neighbours = grid[phase[:, None, 0] + 2 + block[:, 0], phase[:, None, 1] + 2 + block[:, 1]]
+        offsets = points[neighbours] - candidates[:, None, :]
+        return ((offsets * offsets).sum(axis=2) >= radius * radius).all(axis=1)
+
+    for _ in range(rounds):
+        for group in rng.permutation(len(phases)).tolist():
+            phase = phases[group]
+            phase = phase[grid[phase[:, 0] + 2, phase[:, 1] + 2] < 0]
+            candidates = (phase + rng.random(phase.shape)) * cell + origin
+            keep = (candidates < high).all(axis=1)  # The last column and row of cells overhang the bounds
+            for block in (INNER_CELLS, OUTER_CELLS):
+                phase, candidates = phase[keep], candidates[keep]
+                keep = fits(phase, candidates, block)
+            phase, candidates = phase[keep], candidates[keep]
+
+            grid[phase[:, 0] + 2, phase[:, 1] + 2] = np.arange(count, count + len(candidates))
+            points = np.vstack([points[:count], candidates, points[-1:]])
+            count += len(candidates)
+
+    return points[:count]
+
+
+def poisson_disk_count(rng, bounds, count):
+    """Exactly count blue-noise points filling bounds."""
+    x0, y0, x1, y1 = bounds
+    # One round of dart throwing at this radius places a few percent more than count points
+    radius = np.sqrt((x1 - x0) * (y1 - y0) / (2 * count))
+    points = np.zeros((0, 2))
+    while True:
+        start = len(points)
+        points = poisson_disk(rng, bounds, radius, points=points)
+        if len(points) >= count:
+            break
+        radius *= 0.95  # Fell short (tiny or very narrow bounds): fill the gaps at a slightly smaller radius
+
+    # Drop the surplus at random from the last pass, which is spread over the whole area
+    surplus = rng.choice(np.arange(start, len(points)), len(points) - count, replace=False)
+    return np.delete(points, surplus, axis=0)
+
+
+def cell_centroids(vor, count):
+    """Area centroids of the Voronoi cells of the first count points, all of which must be bounded."""
+    cells = [vor.regions[region_index] for region_index in vor.point_region[:count].tolist()]
+    lengths = np.array([len(vertices) for vertices in cells])
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    flat = np.concatenate(cells)
+
+    # Each vertex paired with the next one around its cell, wrapping at the end of the cell
+    following = np.arange(1, len(flat) + 1)
+    following[starts + lengths - 1] = starts
+    a = vor.vertices[flat]
+    b = vor.vertices[flat[following]]
+
+    cross = a[:, 0] * b[:, 1] - b[:, 0] * a[:, 1]
+    area = np.add.reduceat(cross, starts) / 2
+    moments = np.add.reduceat((a + b) * cross[:, None], starts)
+    return moments / (6 * area[:, None])
+
+
+def mirror_points(points, bounding_box):
+    """
+    Mirror points at the edges of the bounding box to ensure bounded Voronoi regions.
+    """
+    points_left = np.copy(points)
+    points_left[:, 0] = bounding_box[0] - (points_left[:, 0] - bounding_box[0])
+
+    points_right = np.copy(points)
+    points_right[:, 0] = bounding_box[1] + (bounding_box[1] - points_right[:, 0])
+
+    points_down = np.copy(points)
+    points_down[:, 1] = bounding_box[2] - (points_down[:, 1] - bounding_box[2])
+
+    points_up = np.copy(points)
+    points_up[:, 1] = bounding_box[3] + (bounding_box[3] - points_up[:, 1])
+
+    # Combine original and mirrored points
+    all_points = np.vstack([points, points_left, points_right, points_down, points_up])
+
+    return all_points
+
+
+def lloyd_relax(points, bounds, iterations=2):
+    """
+    Move every point to the centroid of its Voronoi cell, iterations times.
+
+    The points are mirrored across the four sides of bounds so every cell is
+    closed and clipped to the box. Each iteration is one Voronoi diagram plus
+    segmented sums over its vertices, with no per-cell polygon objects.
+    """
+    x0, y0, x1, y1 = bounds
+    points = np.array(points, dtype='float64')
+    for _ in range(iterations):
+        vor = Voronoi(mirror_points(points, np.array([x0, x1, y0, y1])))
+        points = np.clip(cell_centroids(vor, len(points)), [x0, y0], [x1, y1])
+    return points
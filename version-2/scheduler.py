@@ -0,0 +1,94 @@
+import time
+from collections import deque
+
+
+class FixedStepScheduler:
+    """
+    One fixed-timestep loop for the whole simulation, driven by root.after.
+
+    Every frame the elapsed wall-clock time is added to an accumulator and
+    step(dt) is called once per whole dt in it, so the simulation advances
+    at the same rate however fast frames arrive. At most max_steps_per_frame
+    catch-up steps run in one frame; any further backlog is dropped rather
+    than letting a slow machine fall ever further behind. render(alpha) is
+    called once per frame with the fraction of a step left in the
+    accumulator, for interpolating between the last two states.
+
+    step should return False once there is nothing left to simulate, which
+    stops the loop until start is called again.
+    """
+
+    def __init__(self, root, step, render, dt=0.1, max_steps_per_frame=5, frame_interval=16, history=300):
+        self.root = root
+        self.step = step
+        self.render = render
+        self.dt = dt
+        self.max_steps_per_frame = max_steps_per_frame
+        self.frame_interval = frame_interval  # Milliseconds between frames
+
+        self.after_id = None
+        self.last_time = None
+        self.accumulator = 0.0
+
+        # Timing of the most recent steps and frames, in seconds
+        self.step_times = deque(maxlen=history)
+        self.frame_times = deque(maxlen=history)
+        self.steps = 0
+        self.dropped_steps = 0
+
+    @property
+    def running(self):
+        return self.after_id is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.last_time = time.perf_counter()
+        self.accumulator = 0.0
+        self.after_id = self.root.after(self.frame_interval, self.frame)
+
+    def stop(self):
+        if self.running:
+            self.root.after_cancel(self.after_id)
+        self.after_id = None
+
+    def frame(self):
+        frame_start = time.perf_counter()
+        self.accumulator += frame_start - self.last_time
+        self.last_time = frame_start
+
+        active = True
+        steps = 0
+        while active and self.accumulator >= self.dt and steps < self.max_steps_per_frame:
+            step_start = time.perf_counter()
+            active = self.step(self.dt)
+            self.step_times.append(time.perf_counter() - step_start)
+            self.accumulator -= self.dt
+            self.steps += 1
+            steps += 1
+
+        # Still behind after the catch-up cap: drop the backlog instead of spiralling
+        if self.accumulator >= self.dt:
+            self.dropped_steps += int(self.accumulator // self.dt)
+            self.accumulator %= self.dt
+
+        self.render(self.accumulator / self.dt)
+        self.frame_times.append(time.perf_counter() - frame_start)
+
+        if not active:
+            self.after_id = None
+            return
+        self.after_id = self.root.after(self.frame_interval, self.frame)
+
+    def stats(self):
+        """Summary of recent step and frame timings, in milliseconds."""
+        step_times = list(self.step_times) or [0.0]
+        frame_times = list(self.frame_times) or [0.0]
+        return {
+            "steps": self.steps,
+            "dropped_steps": self.dropped_steps,
+            "mean_step_ms": 1000 * sum(step_times) / len(step_times),
+            "max_step_ms": 1000 * max(step_times),
+            "mean_frame_ms": 1000 * sum(frame_times) / len(frame_times),
+            "max_frame_ms": 1000 * max(frame_times),
+        }
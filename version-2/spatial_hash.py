@@ -0,0 +1,87 @@
+import numpy as np
+
+# Cell coordinates are packed into one int64 key: high 32 bits for x, low 32 bits for y
+KEY_OFFSET = 1 << 30
+KEY_SHIFT = 32
+
+
+class SpatialHash:
+    """
+    Uniform grid over a set of points for fixed-radius neighbour queries.
+
+    Call rebuild once per tick with the current positions; queries then only
+    look at the cells around the query point instead of every other point.
+    With cell_size equal to the query radius that is the 3x3 block of cells.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = float(cell_size)
+        self.positions = np.zeros((0, 2))
+        self.point_keys = np.zeros(0, dtype=np.int64)
+        self.order = np.zeros(0, dtype=np.intp)
+        self.cell_keys = np.zeros(0, dtype=np.int64)
+        self.cell_starts = np.zeros(0, dtype=np.intp)
+        self.cell_counts = np.zeros(0, dtype=np.intp)
+
+    def cell_key(self, cells):
+        cells = cells.astype(np.int64) + KEY_OFFSET
+        return (cells[..., 0] << KEY_SHIFT) | cells[..., 1]
+
+    def rebuild(self, positions):
+        self.positions = np.asarray(positions, dtype='float64').reshape(-1, 2)
+        self.point_keys = self.cell_key(np.floor(self.positions / self.cell_size))
+
+        # Bucket the points by sorting on their cell key
+        self.order = np.argsort(self.point_keys, kind='stable')
+        self.cell_keys, self.cell_starts, self.cell_counts = np.unique(
+            self.point_keys[self.order], return_index=True, return_counts=True)
+
+    def cell_offsets(self, radius):
+        reach = max(int(np.ceil(radius / self.cell_size)), 1)
+        steps = np.arange(-reach, reach + 1, dtype=np.int64)
+        return [(dx << KEY_SHIFT) + dy for dx in steps for dy in steps]
+
+    def lookup(self, keys):
+        """Return (start, count) into self.order for each key; count is 0 for empty cells."""
+        if len(self.cell_keys) == 0:
+            return np.zeros(len(keys), dtype=np.intp), np.zeros(len(keys), dtype=np.intp)
+        slots = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+        found = self.cell_keys[slots] == keys
+        return self.cell_starts[slots], np.where(found, self.cell_counts[slots], 0)
+
+    def query(self, point, radius):
+        """Indices of all points strictly closer than radius to point."""
+        key = self.cell_key(np.floor(np.asarray(point, dtype='float64') / self.cell_size))
+        keys = np.array([key + offset for offset in self.cell_offsets(radius)], dtype=np.int64)
+        starts, counts = self.lookup(keys)
+        candidates = np.concatenate([self.order[s:s + c] for s, c in zip(starts, counts) if c] or [np.zeros(0, dtype=np.intp)])
+
+        offsets = self.positions[candidates] - point
+        return candidates[np.einsum('ij,ij->i', offsets, offsets) < radius * radius]
+
+    def pairs(self, radius):
+        """
+        Every ordered pair (i, j), i != j, of points closer than radius,
+        returned as two index arrays.
+        """
+        firsts, seconds = [], []
+        points = np.arange(len(self.positions))
+        for offset in self.cell_offsets(radius):
+            starts, counts = self.lookup(self.point_keys + offset)
+            total = counts.sum()
+            if total == 0:
+                continue
+            # Expand each point against every member of the neighbouring cell
+            first = np.repeat(points, counts)
+            within_cell = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            firsts.append(first)
+            seconds.append(self.order[np.repeat(starts, counts) + within_cell])
+
+        if not firsts:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+
+        i = np.concatenate(firsts)
+        j = np.concatenate(seconds)
+        offsets = self.positions[i] - self.positions[j]
+        keep = (i != j) & (np.einsum('ij,ij->i', offsets, offsets) < radius * radius)
+        return i[keep], j[keep]
@@ -0,0 +1,29 @@
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+def render_terrain(layers, background="white"):
+    """
+    Rasterise the static terrain into one Pillow image.
+
+    layers is a sequence of (rings, palette, outline_width) in draw order, as
+    passed to GameApp.playable_regions. Returns the image and the canvas
+    coordinates of its top-left corner; edge regions reach past the visible
+    map, so the image is sized to the polygons rather than to the canvas.
+    """
+    padding = max((width for _, _, width in layers), default=0)
+    outlines = np.concatenate([np.asarray(rings[0]) for rings, _, _ in layers] or [np.zeros(2)]).reshape(-1, 2)
+    origin = np.floor(outlines.min(axis=0)) - padding
+    size = np.ceil(outlines.max(axis=0) - origin).astype(int) + padding + 1
+
+    image = Image.new("RGB", tuple(size.tolist()), background)
+    draw = ImageDraw.Draw(image)
+    for rings, palette, width in layers:
+        outline, inner_ring, innermost_ring = ((np.asarray(ring).reshape(-1, 2) - origin).ravel().tolist() for ring in rings)
+        sandy_light, sandy_outline, sandy_light_2, sandy_light_3 = palette
+
+        draw.polygon(outline, fill=sandy_light, outline=sandy_outline, width=width)
+        draw.polygon(inner_ring, fill=sandy_light_2)
+        draw.polygon(innermost_ring, fill=sandy_light_3)
+
+    return image, tuple(origin.tolist())
@@ -0,0 +1,100 @@
+import numpy as np
+import shapely
+from shapely.strtree import STRtree
+
+
+class ViewportCuller:
+    """
+    Keeps canvas items only for the regions near the visible part of a scrolled canvas.
+
+    Region bounding boxes go into an STRtree once. Each update asks the tree
+    which regions overlap the view plus a margin, deletes the items of
+    regions that left it and creates items for regions that entered it, so
+    the canvas holds a screenful of items however large the map is. Nothing
+    happens while the view stays inside the area drawn last time.
+
+    Level of detail: regions smaller than detail_size pixels across are drawn
+    as their outline only, without the inner rings, and city labels are
+    dropped for regions smaller than label_size.
+    """
+
+    def __init__(self, canvas, renderer, layers, cities, tag="region", margin=200, detail_size=24, label_size=40,
+                 overlay_tags=("highlight", "boid")):
+        self.canvas = canvas
+        self.renderer = renderer
+        self.layers = layers  # Region index -> (rings, palette, width), in drawing order
+        self.cities = cities  # Region index -> (x, y) of its city
+        self.tag = tag
+        self.margin = margin
+        self.detail_size = detail_size
+        self.label_size = label_size
+        self.overlay_tags = overlay_tags  # Kept above newly created regions
+
+        self.region_ids = np.fromiter(layers, dtype=np.int64, count=len(layers))
+        self.rank = {region_index: rank for rank, region_index in enumerate(self.region_ids.tolist())}
+        bounds = np.array([self.outline_bounds(rings[0]) for rings, _, _ in layers.values()]).reshape(-1, 4)
+        self.sizes = dict(zip(self.region_ids.tolist(), np.maximum(bounds[:, 2] - bounds[:, 0],
+                                                                    bounds[:, 3] - bounds[:, 1]).tolist()))
+        self.tree = STRtree(shapely.box(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3]))
+
+        self.visible = {}  # Region index -> canvas item ids
+        self.drawn_area = None  # (x0, y0, x1, y1) the visible regions were chosen for
+
+    @staticmethod
+    def outline_bounds(outline):
+        # outline is a flat (x0, y0, x1, y1, ...) tuple
+        xs, ys = outline[0::2], outline[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def view(self):
+        """Canvas coordinates of the visible area."""
+        canvas = self.canvas
+        width = max(canvas.winfo_width(), int(float(canvas.cget("width"))))
+        height = max(canvas.winfo_height(), int(float(canvas.cget("height"))))
+        return canvas.canvasx(0), canvas.canvasy(0), canvas.canvasx(width), canvas.canvasy(height)
+
+    def update(self):
+        x0, y0, x1, y1 = self.view()
+        drawn = self.drawn_area
+        if drawn is not None and drawn[0] <= x0 and drawn[1] <= y0 and x1 <= drawn[2] and y1 <= drawn[3]:
+            return
+
+        margin = self.margin
+        area = (x0 - margin, y0 - margin, x1 + margin, y1 + margin)
+        wanted = set(self.region_ids[self.tree.query(shapely.box(*area))].tolist())
+
+        for region_index in self.visible.keys() - wanted:
+            self.canvas.delete(*self.visible.pop(region_index))
+
+        entering = sorted(wanted - self.visible.keys(), key=self.rank.__getitem__)
+        if entering:
+            self.materialise(entering)
+        self.drawn_area = area
+
+    def materialise(self, region_indices):
+        renderer = self.renderer
+        canvas = self.canvas
+        fresh = (self.tag, "entering")
+        for region_index in region_indices:
+            size = self.sizes[region_index]
+            items = renderer.region_items([self.layers[region_index]], tag=fresh)
+            if size < self.detail_size:
+                items = items[:1]  # Outline only
+
+            city = self.cities.get(region_index)
+            if city is not None:
+                cities, labels = renderer.city_items({region_index: {"is_city": True, "city_coords": city}})
+                items += cities if size < self.label_size else cities + labels
+            self.visible[region_index] = renderer.create(items)
+
+        # New terrain goes underneath what is already drawn (regions do not overlap), keeping its own order
+        canvas.tag_lower("entering")
+        for tag in ("city", "index") + self.overlay_tags:
+            canvas.tag_raise(tag)
+        canvas.dtag("entering", "entering")
+
+    def clear(self):
+        for items in self.visible.values():
+            self.canvas.delete(*items)
+        self.visible = {}
+        self.drawn_area = None